@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+import time
+
+# Discord snowflakes are milliseconds since this epoch, shifted left 22 bits
+DISCORD_EPOCH = 1420070400000
+REORDER_WINDOW = 0.025  # seconds
+
+
+def snowflake_at(timestamp):
+    """The smallest snowflake Discord could give a message sent at `timestamp`."""
+    return (int(timestamp * 1000) - DISCORD_EPOCH) << 22
+
+
+def snowflake_time(snowflake):
+    return ((snowflake >> 22) + DISCORD_EPOCH) / 1000
+
+
+class AuctionActor:
+    """Applies every change to a draft's state from one actor task.
+
+    Commands are submitted as plain (synchronous) callables and run one at a
+    time, so nothing else can touch the auction while one is applied. The
+    caller awaits a future for the result, or the exception it raised.
+
+    Pending commands are ordered by the snowflake of the Discord message that
+    caused them; internal ones (timer expiry, the draft driver) use the
+    snowflake of the moment they were submitted. The actor holds each command
+    for up to REORDER_WINDOW after it arrives so that messages the gateway
+    delivers slightly out of order are still applied in the order they were
+    sent.
+    """
+
+    def __init__(self, reorder_window=REORDER_WINDOW, clock=time.monotonic):
+        self.reorder_window = reorder_window
+        self.clock = clock
+        self._queue = None
+        self._task = None
+        self._order = itertools.count()
+
+        self.processed = 0
+        self.max_depth = 0
+        self.last_service_time = 0
+        self.max_service_time = 0
+        self.total_service_time = 0
+        self.max_wait_time = 0
+
+    @property
+    def queue(self):
+        # Created lazily so it belongs to the loop the actor runs on
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        return self._queue
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def submit(self, fn, *args, snowflake=None):
+        """Queues fn(*args) and returns a future for its result."""
+        self.start()
+        if snowflake is None:
+            snowflake = snowflake_at(time.time())
+        future = asyncio.get_event_loop().create_future()
+        self.queue.put_nowait((snowflake, next(self._order), self.clock(), fn, args, future))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return future
+
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            hold = item[2] + self.reorder_window - self.clock()
+            if hold > 0:
+                # Give a message sent earlier but delivered later a chance to
+                # overtake this one
+                self.queue.put_nowait(item)
+                await asyncio.sleep(hold)
+                item = self.queue.get_nowait()
+            self._apply(*item)
+
+    def _apply(self, snowflake, order, queued_at, fn, args, future):
+        if future.cancelled():
+            # The caller gave up (e.g. a timer that was cancelled meanwhile)
+            return
+        start = self.clock()
+        self.max_wait_time = max(self.max_wait_time, start - queued_at)
+        try:
+            result = fn(*args)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            self.last_service_time = self.clock() - start
+            self.max_service_time = max(self.max_service_time, self.last_service_time)
+            self.total_service_time += self.last_service_time
+            self.processed += 1
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def reset_peaks(self):
+        self.max_depth = self.depth()
+        self.max_service_time = 0
+        self.max_wait_time = 0
+
+    def stats(self):
+        return dict(
+            processed=self.processed,
+            depth=self.depth(),
+            max_depth=self.max_depth,
+            last_service_time=self.last_service_time,
+            max_service_time=self.max_service_time,
+            mean_service_time=self.total_service_time / self.processed if self.processed else 0,
+            max_wait_time=self.max_wait_time,
+        )
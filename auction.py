@@ -1,31 +1,46 @@
 import asyncio
+import functools
 from logging import log
+import math
 import os
+import time
 
 from dotenv import load_dotenv
 
 # This has to come first because it patches the env, and the replit-db looks for REPLIT_DB_URL in the env
 load_dotenv()
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.enums import ChannelType
-from replit import db
 from transitions import Machine
 from log_utils import log_command
 from log_utils import command_log
+from log_utils import log_event
+from log_utils import stop_event_log
 
-from draft import Auction, AuctionValidationError, ClientMessageType
+from actor import AuctionActor
+from board import AuctionBoard
+from draft import Auction, AuctionValidationError, ClientMessage, ClientMessageType
 from draft import ADMIN_IDS
 import embed
 import playerlist_util
-from lot import Lot
+from lot import ANNOUNCE_EVERY, Lot
+from member_index import MemberIndex
+from journal import open_journal_from_env
 from keep_alive import keep_alive
+from loop_monitor import LoopStallMonitor
+import metrics
+from outbound import COUNTDOWN, NORMAL, URGENT, OutboundScheduler
+from paginator import Paginator
+from purge import PurgeQueue
+from storage import FLUSH_INTERVAL, AsyncStore, WriteBehindStore, open_store_from_env
 
 import random
 
 intents = discord.Intents.default()
 intents.members = True
 client = commands.Bot(command_prefix='!', intents=intents)
+member_index = MemberIndex()
 
 
 class UserType:
@@ -51,56 +66,120 @@ async def on_ready():
     print("Bot is ready.")
 
 
+NOMINATION_WARNINGS = (10, 5)  # seconds left
+
+
 class NominationTimer:
-    def __init__(self, t, captain_name, ctx):
+    """Counts down a captain's nomination window.
+
+    The timer runs as its own task and only wakes for the warnings and for
+    expiry; pause and resume wake it immediately. On expiry on_expire is
+    called in the same step that marks the timer expired (on the actor, if
+    one is given), so a nomination either cancels the timer first or finds
+    it expired, never both.
+    """
+
+    def __init__(
+        self, t, captain_name, ctx, on_expire=None, actor=None, send=None, clock=time.monotonic
+    ):
         self.t = t
         self.captain_name = captain_name
         self.ctx = ctx
+        self.send = send or ctx.send
+        self.on_expire = on_expire
+        self.actor = actor
+        self.clock = clock
+        self.deadline = None
+        self.paused_remaining = None
         self.cancelled = False
-        self.paused = False
+        self.expired = False
+        self.task = None
+        self.wakeup = asyncio.Event()
+
+    @property
+    def paused(self):
+        return self.paused_remaining is not None
+
+    def start(self):
+        self.task = asyncio.ensure_future(self.run())
+        if self.cancelled:
+            self.task.cancel()
+        return self.task
 
     async def run(self):
-        players_to_nom = db["players"]
-        await self.ctx.send(embed = embed.playerlist(players_to_nom))
-        await self.ctx.send(
+        await self.send(
             embed = embed.display_transition_to_nomination(
                 self.captain_name, 
                 CAPTAIN_NOMINATION_TIMEOUT,
             )
         )
         user = AuctionBot.get_mention(self.captain_name)
-        await self.ctx.send(user.mention)
-        for i in range(self.t, 0, -1):
-            while self.paused:
-                await asyncio.sleep(1)
-
-            if self.cancelled:
-                raise asyncio.CancelledError()
-
-            await asyncio.sleep(1)
-            if i == 10:
-                await self.ctx.send(
-                    f"{self.captain_name} has {i} seconds left to nominate a player."
-                )
-            if i == 5:
-                await self.ctx.send(
-                    f"{self.captain_name} has {i} seconds left to nominate a player."
-                )
+        if user is not None:
+            await self.send(user.mention)
+
+        if self.deadline is None and not self.paused:
+            self.deadline = self.clock() + self.t
+        warnings = [w for w in NOMINATION_WARNINGS if w < self.t]
+        while True:
+            self.wakeup.clear()
+            if self.paused:
+                await self.wakeup.wait()
+                continue
+            left = self.deadline - self.clock()
+            if left <= 0:
+                break
+            warning = max([w for w in warnings if w < left], default=0)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), left - warning)
+            except asyncio.TimeoutError:
+                if warning and not self.paused:
+                    warnings.remove(warning)
+                    await self.send(
+                        f"{self.captain_name} has {warning} seconds left to nominate a player."
+                    )
+
+        if self.actor is not None:
+            return await self.actor.submit(self.expire)
+        return self.expire()
+
+    def expire(self):
+        if self.cancelled:
+            return None
+        self.expired = True
+        if self.on_expire is not None:
+            return self.on_expire()
 
     def pause(self):
-        self.paused = True
+        if self.paused or self.expired:
+            return
+        if self.deadline is None:
+            self.paused_remaining = self.t
+        else:
+            self.paused_remaining = max(0, self.deadline - self.clock())
+        self.wakeup.set()
 
     def resume(self):
-        self.paused = False
+        if not self.paused:
+            return
+        self.deadline = self.clock() + self.paused_remaining
+        self.paused_remaining = None
+        self.wakeup.set()
 
     def cancel(self):
+        """Stops the timer. Returns False if it has already expired."""
+        if self.expired:
+            return False
         self.cancelled = True
+        if self.task is not None:
+            self.task.cancel()
+        return True
 
 
 CAPTAIN_NOMINATION_TIMEOUT = 30
+# Earlier countdowns are only shown on the auction board
+COUNTDOWN_MESSAGES_FROM = 10  # seconds left
 BUFFER_TIMER = 10
 BREAK_TIMER = 60
-NUMBER_OF_ROUNDS = 4
 
 
 class AuctionBot(commands.Cog):
@@ -117,8 +196,93 @@ class AuctionBot(commands.Cog):
         self.client = client
         self.current_timer = None
         self.debug = debug
-        self.auction = Auction()
+        journal = open_journal_from_env()
+        self.auction = Auction(db=None if journal else open_store_from_env(), journal=journal)
         self.starting_context = None
+        # Off-phase chatter in the draft channel is deleted in batches
+        self.purge_channel_id = None
+        self.purge = PurgeQueue()
+
+        # Keep replit HTTP calls off the event loop; SQLite is local and
+        # doesn't buffer, so it's left as is.
+        self.async_store = None
+        if isinstance(self.auction.db, WriteBehindStore):
+            self.async_store = AsyncStore(self.auction.db)
+            self.auction.flush_in_background = self.async_store.request_flush
+        # Everything that changes the draft goes through this, one at a time
+        self.actor = AuctionActor()
+        self.outbound = OutboundScheduler()
+        metrics.OUTBOUND_DEPTH.set_function(self.outbound.depths)
+        self.status_server = None
+        self.board = None
+        self.paginator = Paginator()
+        self.roles_by_author = {}
+        self.roles_version = None
+        self.whitelist_timings = {}
+        self.stall_monitor = LoopStallMonitor()
+        self.lot_wakeup = None
+        self.driver = None
+        self.flush_db.start()
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        if payload.user_id == self.client.user.id:
+            return
+        await self.paginator.on_reaction(payload.message_id, str(payload.emoji), payload.member)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.stall_monitor.start()
+        member_index.rebuild(self.client.get_all_members())
+        print(f"Indexed {len(member_index)} members")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        member_index.add(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        member_index.remove(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.name != after.name:
+            member_index.rename(after.id, before.name, after.name)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        # Username changes come through here rather than on_member_update
+        if before.name != after.name:
+            member_index.rename(after.id, before.name, after.name)
+
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_db(self):
+        if self.async_store is not None:
+            await self.async_store.flush()
+        else:
+            self.auction.flush()
+
+    async def serve_status(self):
+        """Runs the status server until this task is cancelled at shutdown."""
+        self.stall_monitor.start()
+        self.status_server = await keep_alive(self.client, self.auction, self.stall_monitor)
+        try:
+            await asyncio.get_event_loop().create_future()
+        finally:
+            await self.status_server.close()
+
+    def cog_unload(self):
+        self.flush_db.cancel()
+        self.auction.flush()
+
+    async def cog_before_invoke(self, ctx):
+        ctx.invoked_at = time.perf_counter()
+
+    async def cog_after_invoke(self, ctx):
+        # Runs even if the command raised
+        name = ctx.command.name
+        metrics.COMMANDS.inc(name, "failed" if ctx.command_failed else "ok")
+        metrics.COMMAND_LATENCY.observe(time.perf_counter() - ctx.invoked_at, name)
 
 
     def is_admin(self, ctx):
@@ -126,85 +290,109 @@ class AuctionBot(commands.Cog):
             return True
         return False
     
+    async def apply(self, fn, *args, message=None):
+        """Runs fn(*args) on the draft's actor, in order of the message that caused it."""
+        snowflake = message.id if message is not None else None
+        return await self.actor.submit(fn, *args, snowflake=snowflake)
+
+    def say(self, ctx, content=None, embed=None, priority=NORMAL):
+        """Queues a message for ctx's channel; await the result to wait until it's sent."""
+        return self.outbound.send(ctx.channel, content, embed=embed, priority=priority)
+
     def get_mention(name):
+        return member_index.get(name, scan=AuctionBot.scan_members)
+
+    def scan_members(name):
         members = client.get_all_members()
         user = discord.utils.get(members, name=name)
         return user
 
+    def roles_for(self, author):
+        """The UserTypes an author has, worked out once per version of the draft.
+
+        Captains and players only change along with Auction.version, so the
+        cache is dropped whenever that moves. Call invalidate_roles() after
+        changing ADMIN_IDS or debug.
+        """
+        if self.roles_version != self.auction.version:
+            self.invalidate_roles()
+        key = (author.id, author.name)
+        roles = self.roles_by_author.get(key)
+        if roles is None:
+            roles = set()
+            if author.id in ADMIN_IDS or self.debug:
+                roles.add(UserType.ADMIN)
+            if self.auction.search_captain(author.name) is not None:
+                roles.add(UserType.CAPTAIN)
+            if self.auction.search_player(author.name) is not None:
+                roles.add(UserType.PLAYER)
+            roles = frozenset(roles)
+            self.roles_by_author[key] = roles
+        return roles
+
+    def invalidate_roles(self):
+        self.roles_by_author = {}
+        self.roles_version = self.auction.version
+
     def whitelist(self, ctx, dm=None, channel=None, channel_names=None):
-        if dm is None:
-            dm = []
-        if channel is None:
-            channel = []
-        if channel_names is None:
-            channel_names = []
+        start = time.perf_counter()
+        try:
+            return self._whitelist(ctx, dm or [], channel or [], channel_names or [])
+        finally:
+            elapsed = time.perf_counter() - start
+            name = ctx.command.name if ctx.command is not None else None
+            count, total, longest = self.whitelist_timings.get(name, (0, 0, 0))
+            self.whitelist_timings[name] = (count + 1, total + elapsed, max(longest, elapsed))
 
+    def _whitelist(self, ctx, dm, channel, channel_names):
         message_channel = ctx.channel
-        author = ctx.message.author
         if message_channel.type == ChannelType.private:
             # Is DM
-            if UserType.ANY in dm:
-                return True
-            elif self.is_admin(ctx) and UserType.ADMIN in dm:
-                return True
-            elif (
-                self.auction.search_captain(author.name) is not None
-                and UserType.CAPTAIN in dm
-            ):
-                return True
-            elif (
-                self.auction.search_player(author.name) is not None
-                and UserType.PLAYER in dm
-            ):
-                return True
-            return False
-
-        if (
+            allowed = dm
+        elif (
             message_channel.type == ChannelType.text
             and message_channel.name in channel_names
         ):
-            if UserType.ANY in channel:
-                return True
-            elif self.is_admin(ctx) and UserType.ADMIN in channel:
-                return True
-            elif (
-                self.auction.search_captain(author.name) is not None
-                and UserType.CAPTAIN in channel
-            ):
-                return True
-            elif (
-                self.auction.search_player(author.name) is not None
-                and UserType.PLAYER in channel
-            ):
-                return True
+            allowed = channel
+        else:
             return False
+        if UserType.ANY in allowed:
+            return True
+        return not self.roles_for(ctx.message.author).isdisjoint(allowed)
 
-        return False
+    def whitelist_stats(self):
+        """Per command: (checks, mean seconds, max seconds)."""
+        return {
+            name: (count, total / count, longest)
+            for name, (count, total, longest) in self.whitelist_timings.items()
+        }
     
     @commands.Cog.listener()
     async def on_message(self, message):
-        if message.channel == self.starting_context.channel:
-            if self.auction.machine.state == "buffering" or self.auction.machine.state == 'break':                                                
-                if message.author.id in ADMIN_IDS:                                      # can't use whitelist method, on_message takes a message object, not ctx
-                    return
-                else:
-                    await message.delete()
+        # Runs for every message the bot sees, so the channel check goes first
+        if message.channel.id != self.purge_channel_id:
+            return
+        if self.auction.machine.state == "buffering" or self.auction.machine.state == 'break':                                                
+            if message.author.id in ADMIN_IDS:                                      # can't use whitelist method, on_message takes a message object, not ctx
+                return
+            self.purge.add(message)
 
     @commands.command()
     async def start(self, ctx):
         self.starting_context = ctx
+        self.purge_channel_id = ctx.channel.id
         log_command(ctx)
         if not self.whitelist(
             ctx, channel=[UserType.ADMIN], channel_names=GENERIC_DRAFT_CHANNEL_NAMES
         ):
             return
         try:
-            client_message = self.auction.start(ctx.message)
-            await ctx.send(client_message.data)
+            client_message = await self.apply(self.auction.start, ctx.message, message=ctx.message)
+            await self.say(ctx, client_message.data)
         except AuctionValidationError as e:
             if e.client_message.type == ClientMessageType.CHANNEL_MESSAGE:
-                await ctx.send(e.client_message.data)
-        await self._transition_to_nominating_and_start_timer(ctx)
+                await self.say(ctx, e.client_message.data)
+        self.start_driver(ctx)
 
     def _name_with_discriminator(self, author):
         return author.name + "#" + author.discriminator
@@ -223,11 +411,28 @@ class AuctionBot(commands.Cog):
 
     async def _nominate(self, ctx):
         try:
-            new_lot = self.auction.nominate(ctx.message)
+            return await self.apply(self._apply_nomination, ctx.message, message=ctx.message)
         except AuctionValidationError as e:
-            await ctx.send(e.client_message.data)
+            await self.say(ctx, e.client_message.data)
             return None
 
+    def _apply_nomination(self, message):
+        if self.auction.current_lot is not None:
+            raise AuctionValidationError(
+                ClientMessage(
+                    type=ClientMessageType.CHANNEL_MESSAGE,
+                    data=f"{self.auction.current_lot.player} is already up for auction.",
+                )
+            )
+        if self.current_timer is not None and self.current_timer.expired:
+            raise AuctionValidationError(
+                ClientMessage(
+                    type=ClientMessageType.CHANNEL_MESSAGE,
+                    data="Too late, the auto-nominator already picked for this turn.",
+                )
+            )
+        new_lot = self.auction.nominate(message)
+
         # Someone was waiting on a successful nomination, let them know it's done
         if self.current_timer is not None:
             self.current_timer.cancel()
@@ -235,89 +440,273 @@ class AuctionBot(commands.Cog):
 
         return new_lot
 
-    async def _transition_to_nominating_and_start_timer(self, ctx):
-        if self.auction.machine.state == 'starting':
-            self.auction.machine.nom_from_start()
-        elif self.auction.machine.state == 'bidding':
-            self.auction.machine.nom_from_bid()
-        next_captain = self.auction.get_next_captain()
-        if next_captain is None:
-            await ctx.send("All done. *Throne exploding noises*")
-            return
-        self.current_timer = NominationTimer(
-            CAPTAIN_NOMINATION_TIMEOUT, next_captain['name'], ctx
-        )
+    def start_driver(self, ctx):
+        """Starts the draft driver task. Returns False if it is already running."""
+        if self.driver is not None and not self.driver.done():
+            return False
+        if self.board is None or self.board.message is None:
+            self.board = AuctionBoard(self._render_board, functools.partial(self.say, ctx))
+        self.board.refresh()
+        self.driver = asyncio.ensure_future(self._drive_draft(ctx))
+        self.driver.add_done_callback(self._driver_done)
+        return True
+
+    async def stop_driver(self):
+        """Stops the draft driver where it is. Returns False if it wasn't running.
+
+        A lot that is being bid on is paused rather than lost, so the draft
+        picks up from the same place when the driver is started again.
+        """
+        if self.driver is None or self.driver.done():
+            return False
+        self.driver.cancel()
         try:
-            await self.current_timer.run()
-            new_lot = self.auction.autonominate(next_captain)
-            await ctx.send(
-                f"Timer expired. Auto-nominator has nominated {new_lot.player} on behalf of {new_lot.nominator}"
-            )
-            await self._run_lot(ctx)
+            await self.driver
         except asyncio.CancelledError:
+            pass
+        self.driver = None
+        self.current_timer = None
+        await self.apply(self._pause_lot_for_stop)
+        return True
+
+    def _pause_lot_for_stop(self):
+        if self.auction.machine.state == "bidding" and self.auction.current_lot:
+            self.auction.current_lot.pause()
+
+    def playerlist_pages(self):
+        return embed.playerlist_pages(auction=self.auction)
+
+    async def send_playerlist(self, ctx):
+        await self.paginator.send(functools.partial(self.say, ctx), self.playerlist_pages)
+
+    def refresh_board(self):
+        if self.board is not None:
+            self.board.refresh()
+
+    def _render_board(self):
+        lot = self.auction.current_lot
+        state = self.auction.machine.state
+        player = nominator = high_bid = time_left = None
+        if lot is not None:
+            player = self.auction.search_player(lot.player)
+            nominator = lot.nominator
+            high_bid = lot.current_max_bid
+
+        if state == "bidding" and lot is not None:
+            if lot.closing:
+                status = "Bidding closed, counting bids sent before the deadline."
+            elif lot.is_paused:
+                status = "Bidding is paused."
+                time_left = f"{math.ceil(lot.seconds_left())} seconds"
+            else:
+                status = f"Bidding on {lot.player} is open."
+                # Only as fine as the announcements, so the board isn't
+                # edited every second
+                left = lot.seconds_left()
+                if left is not None:
+                    time_left = f"{ANNOUNCE_EVERY * math.ceil(left / ANNOUNCE_EVERY)} seconds or less"
+        elif state == "buffering" and lot is not None:
+            status = f"Bidding on {lot.player} starts in a moment."
+        elif state == "nominating" and self.current_timer is not None:
+            status = f"{self.current_timer.captain_name} is up to nominate."
+        elif state == "break":
+            status = "Break between rounds."
+        else:
+            status = "Waiting for the draft."
+        if lot is None and self.auction.nominations:
+            last = self.auction.nominations[-1]
+            status += f"\nLast sale: {last.player_name} to {last.captain} for ${last.amount_paid}."
+        return embed.auction_board(status, player, nominator, high_bid, time_left, self.auction.captains)
+
+    def _driver_done(self, task):
+        if task.cancelled():
             return
-    
+        e = task.exception()
+        if e is not None:
+            print(f"Draft driver stopped: {e!r}")
+            command_log.error("Draft driver stopped", exc_info=e)
+
+    async def _drive_draft(self, ctx):
+        """Runs the draft phase by phase: nominate, buffer, bid, award, break.
+
+        Each pass looks at the state machine to decide what to do next, so a
+        restarted driver carries on from wherever the last one was stopped.
+        """
+        while True:
+            self.refresh_board()
+            state = self.auction.machine.state
+            if state == "starting":
+                await self.apply(self.auction.machine.nom_from_start)
+            elif state == "break":
+                await self.apply(self.auction.machine.nom_from_break)
+            elif state == "nominating" and self.auction.current_lot is None:
+                new_lot = await self._wait_for_nomination(ctx)
+                if new_lot is None:
+                    return
+            elif state == "nominating":
+                await self._announce_lot(ctx)
+                await self.buffer()
+            elif state == "buffering":
+                await self.apply(self.auction.machine.bid_from_buff)
+            elif state == "bidding":
+                await self._run_lot(ctx)
+                if await self.apply(self.auction.is_end_of_round):
+                    await self.take_break(ctx)
+            else:
+                return
+
+    async def _wait_for_nomination(self, ctx):
+        timer = await self.apply(self._open_nomination, ctx)
+        if timer is None:
+            if self.auction.current_lot is not None:
+                return self.auction.current_lot
+            await self.say(ctx, "All done. *Throne exploding noises*")
+            return None
+        self.refresh_board()
+        await self.send_playerlist(ctx)
+        timer_task = timer.start()
+        try:
+            await asyncio.wait([timer_task])
+        finally:
+            timer_task.cancel()
+
+        # A successful !nominate cancels the timer
+        if timer_task.cancelled():
+            return self.auction.current_lot
+        new_lot = timer_task.result()
+        await self.say(
+            ctx,
+            f"Timer expired. Auto-nominator has nominated {new_lot.player} on behalf of {new_lot.nominator}",
+            priority=URGENT,
+        )
+        return new_lot
+
+    def _open_nomination(self, ctx):
+        """Starts the next captain's turn. None if the draft is over or a
+        nomination already came in."""
+        next_captain = self.auction.get_next_captain()
+        if next_captain is None or self.auction.current_lot is not None:
+            return None
+        self.current_timer = NominationTimer(
+            CAPTAIN_NOMINATION_TIMEOUT,
+            next_captain['name'],
+            ctx,
+            on_expire=functools.partial(self.auction.autonominate, next_captain),
+            actor=self.actor,
+            send=functools.partial(self.say, ctx),
+        )
+        return self.current_timer
+
     async def buffer(self):
-        self.auction.machine.buff_from_nom()
+        await self.apply(self.auction.machine.buff_from_nom)
         await asyncio.sleep(BUFFER_TIMER)
-        self.auction.machine.bid_from_buff()
+        await self.apply(self.auction.machine.bid_from_buff)
     
     async def take_break(self, ctx):
-        self.auction.machine.break_from_nom()  
-        await ctx.send(embed=embed.display_break(BREAK_TIMER))
+        await self.apply(self.auction.machine.break_from_nom)
+        await self.say(ctx, embed=embed.display_break(BREAK_TIMER))
         await asyncio.sleep(5)
         
-        teams = self.auction.get_current_teams()
-        for captains, players in teams.items():
-            captain = self.auction.search_captain(captains)
-            bank = captain["dollars"]
-            await ctx.send(embed = embed.display_team(captains, bank, players))
-        await ctx.send(embed=embed.playerlist(self.auction.players))
+        for captain_name, roster in self.auction.rosters.items():
+            bank = self.auction.search_captain(captain_name)["dollars"]
+            await self.say(
+                ctx, embed=embed.display_team(captain_name, bank, roster, auction=self.auction)
+            )
+        await self.send_playerlist(ctx)
         
         await asyncio.sleep(BREAK_TIMER)
-        self.auction.machine.nom_from_break()
+        await self.apply(self.auction.machine.nom_from_break)
+        log_event("break_over", purge=self.purge.stats())
 
-    async def _run_lot(self, ctx):
-        # We have a nomination, run the lot
+    def wake_lot(self):
+        if self.lot_wakeup is not None:
+            self.lot_wakeup.set()
+        self.refresh_board()
+
+    def _start_lot_clock(self, lot):
+        if lot.deadline is None and not lot.is_paused:
+            lot.start_clock()
+
+    async def _announce_lot(self, ctx):
         player_name = self.auction.current_lot.player 
-        captain_name = self.auction.current_lot.nominator
         print(f"Starting lot {self.auction.current_lot.to_dict()}")
 
-        await ctx.send(
-            embed=embed.display_successful_nomination(
-                self.auction.search_player(player_name),
-                self.auction.search_captain(captain_name),
-                BUFFER_TIMER
-            )
-        )
-        await ctx.send(embed=embed.captainlist(self.auction.captains))
-        await ctx.send(
+        # The board shows the nomination and the captains' banks
+        await self.say(
+            ctx,
             embed=embed.player_info(
                 self.auction.search_player(player_name)
             )
         )
 
-        await self.buffer()
-
-        for time_remaining in self.auction.run_current_lot():
-            await asyncio.sleep(1)
-            if time_remaining is None:
+    async def _run_lot(self, ctx):
+        lot = self.auction.current_lot
+        player_name = lot.player
+        self.stall_monitor.reset()
+        self.actor.reset_peaks()
+        sender = self.outbound.sender_for(ctx.channel)
+        sender.reset_peaks()
+        self.lot_wakeup = asyncio.Event()
+        while True:
+            # Bids and pause/resume move the deadline and set lot_wakeup, so
+            # the next wait is always worked out from the current deadline.
+            self.lot_wakeup.clear()
+            if lot.is_paused:
+                await self.lot_wakeup.wait()
                 continue
-            if time_remaining > 0 and time_remaining % 5 == 0:
-                await ctx.send(
-                    f"{time_remaining} seconds left for player {player_name}"
+            # A lot resumed by a restarted driver keeps its clock; one paused
+            # before its clock ever started gets a fresh one
+            if lot.deadline is None:
+                await self.apply(self._start_lot_clock, lot)
+                continue
+            # Checked again on the actor, in case a bid just moved the deadline
+            if lot.is_closed() and await self.apply(lot.begin_close):
+                break
+            mark = lot.next_announcement()
+            try:
+                await asyncio.wait_for(
+                    self.lot_wakeup.wait(), lot.seconds_left() - mark
                 )
-        nomination = self.auction.give_lot_to_winner()
-        await ctx.send(
-            embed=embed.winning_bid(nomination)
+            except asyncio.TimeoutError:
+                self.refresh_board()
+                if 0 < mark <= COUNTDOWN_MESSAGES_FROM and round(lot.seconds_left()) == mark:
+                    # Not awaited: a countdown must never hold up the lot
+                    self.say(ctx, f"{mark} seconds left for player {player_name}", priority=COUNTDOWN)
+        self.refresh_board()
+        await asyncio.sleep(lot.grace_left())
+        nomination, rejected = await self.apply(self._close_lot)
+        self.lot_wakeup = None
+        metrics.LOT_CLOSE_DRIFT.observe(lot.close_drift)
+
+        actor_stats = self.actor.stats()
+        sender_stats = sender.stats()
+        log_event(
+            "lot_closed",
+            player=nomination.player_name,
+            close_drift_ms=round(lot.close_drift * 1000, 1),
+            max_loop_stall_ms=round(self.stall_monitor.max_stall * 1000, 1),
+            max_queue_depth=actor_stats["max_depth"],
+            max_service_ms=round(actor_stats["max_service_time"] * 1000, 2),
+            max_queue_wait_ms=round(actor_stats["max_wait_time"] * 1000, 1),
+            max_outbound_depth=sender_stats["max_depth"],
+            max_send_latency_ms=round(sender_stats["max_latency"] * 1000, 1),
+            countdowns_merged=sender_stats["merged"],
         )
-        nom_break = len(self.auction.db["players"])/NUMBER_OF_ROUNDS
-        if len(self.auction.db["nominations"]) % nom_break == 0 and len(self.auction.db["nominations"]) > 0:
-            await self.take_break(ctx)
-        
-        # Yes, this is intentionally recursive. The idea is that the auction
-        # should be able to run itself without human input.
-        await self._transition_to_nominating_and_start_timer(ctx)
+        # These captains were told their bid would count at the close
+        for client_message in rejected:
+            self.say(ctx, client_message.data, priority=URGENT)
+        await self.say(
+            ctx,
+            embed=embed.winning_bid(nomination),
+            priority=URGENT,
+        )
+
+    def _close_lot(self):
+        # The turn's timer is done with once its lot closes; an expired one
+        # left behind would turn away the next !nominate as too late
+        self.current_timer = None
+        rejected = self.auction.close_current_lot()
+        return self.auction.give_lot_to_winner(), rejected
 
     @commands.command()
     async def nominate(self, ctx):
@@ -329,23 +718,18 @@ class AuctionBot(commands.Cog):
             channel_names=GENERIC_DRAFT_CHANNEL_NAMES,
         ):
             return
-        try:
-            new_lot = await self._nominate(ctx)
-            if new_lot is None:
-                if self.auction.machine.state == 'nominating' and self.current_timer is None:
-                    print("Invalid nomination and no autonom timer")
-                    command_log.warning(
-                        "Invalid nomination and no autonom timer",
-                    )
-                return
-            await self._run_lot(ctx)
-
-        except asyncio.CancelledError:
-            print("Nomination timer cancelled successfully")
-            pass
+        # The draft driver picks the new lot up once the timer is cancelled
+        new_lot = await self._nominate(ctx)
+        if new_lot is None:
+            if self.auction.machine.state == 'nominating' and self.current_timer is None:
+                print("Invalid nomination and no autonom timer")
+                command_log.warning(
+                    "Invalid nomination and no autonom timer",
+                )
 
     @commands.command()
     async def bid(self, ctx):
+        received = time.perf_counter()
         log_command(ctx)
 
         player_name = self.auction.current_lot.player
@@ -364,17 +748,29 @@ class AuctionBot(commands.Cog):
         ):
             return
         try:
-            time_remaining = self.auction.bid(ctx.message)
+            time_remaining = await self.apply(self.auction.bid, ctx.message, message=ctx.message)
             if time_remaining is not None:
+                self.wake_lot()
                 await ctx.message.add_reaction(self.emojis["plus"])
-                await ctx.send(f"{time_remaining} seconds left after latest bid.")
+                metrics.BID_ACK_LATENCY.observe(
+                    time.perf_counter() - received, "late" if time_remaining == 0 else "accepted"
+                )
+                # The board shows the new time left, only late bids need a reply
+                if time_remaining == 0:
+                    await self.say(
+                        ctx,
+                        "Bid was in before the deadline, it counts when the lot closes.",
+                        priority=URGENT,
+                    )
                 if player_name == 'tornadospeed':
                     cheater = random.choice(cheater_messages)
-                    await ctx.send(cheater)
+                    await self.say(ctx, cheater)
         except AuctionValidationError as e:
             if e.client_message.type == ClientMessageType.CHANNEL_MESSAGE:
-                await ctx.send(e.client_message.data)
-                await ctx.message.add_reaction(self.emojis["minus"])
+                await self.say(ctx, e.client_message.data, priority=URGENT)
+            # Every rejected bid gets a minus, whatever else it was told
+            await ctx.message.add_reaction(self.emojis["minus"])
+            metrics.BID_ACK_LATENCY.observe(time.perf_counter() - received, "rejected")
             return None
 
     @commands.command()
@@ -385,12 +781,9 @@ class AuctionBot(commands.Cog):
             ctx, channel=[UserType.ADMIN], channel_names=GENERIC_DRAFT_CHANNEL_NAMES
         ):
             return
-        if self.auction.machine.state == "nominating":
-            self.current_timer.pause()
-            await ctx.send("Nomination timer paused.")
-        elif self.auction.machine.state == "bidding":
-            self.auction.current_lot.is_paused = True
-            await ctx.send("Bidding timer paused.")
+        reply = await self.apply(self._apply_pause, True, message=ctx.message)
+        if reply is not None:
+            await self.say(ctx, reply)
 
     @commands.command()
     async def resume(self, ctx):
@@ -400,12 +793,53 @@ class AuctionBot(commands.Cog):
             ctx, channel=[UserType.ADMIN], channel_names=GENERIC_DRAFT_CHANNEL_NAMES
         ):
             return
-        if self.auction.machine.state == "nominating":
+        reply = await self.apply(self._apply_pause, False, message=ctx.message)
+        if reply is not None:
+            await self.say(ctx, reply)
+
+    def _apply_pause(self, paused):
+        if self.auction.machine.state == "nominating" and self.current_timer is not None:
+            if paused:
+                self.current_timer.pause()
+                return "Nomination timer paused."
             self.current_timer.resume()
-            await ctx.send("Nomination timer resumed.")
+            return "Nomination timer resumed."
         elif self.auction.machine.state == "bidding":
-            self.auction.current_lot.is_paused = False
-            await ctx.send("Bidding timer resumed.")
+            if paused:
+                self.auction.current_lot.pause()
+            else:
+                self.auction.current_lot.resume()
+            self.wake_lot()
+            return "Bidding timer paused." if paused else "Bidding timer resumed."
+        return None
+
+    @commands.command()
+    async def stopdraft(self, ctx):
+        log_command(ctx)
+        if not self.whitelist(
+            ctx, channel=[UserType.ADMIN], channel_names=GENERIC_DRAFT_CHANNEL_NAMES
+        ):
+            return
+        if await self.stop_driver():
+            await self.say(ctx, "Draft stopped. Use !restartdraft to carry on.")
+        else:
+            await self.say(ctx, "The draft isn't running.")
+
+    @commands.command()
+    async def restartdraft(self, ctx):
+        log_command(ctx)
+        if not self.whitelist(
+            ctx, channel=[UserType.ADMIN], channel_names=GENERIC_DRAFT_CHANNEL_NAMES
+        ):
+            return
+        if self.auction.machine.state in ("asleep", "ending"):
+            await self.say(ctx, "There is no draft to restart.")
+            return
+        await self.stop_driver()
+        self.start_driver(ctx)
+        await self.say(ctx, "Draft restarted.")
+        if self.auction.current_lot is not None and self.auction.current_lot.is_paused:
+            await self.say(ctx, "Bidding timer is paused, use !resume to continue.")
 
     @commands.command()
     async def playerlist(self, ctx):
@@ -417,7 +851,7 @@ class AuctionBot(commands.Cog):
             channel_names=GENERIC_DRAFT_CHANNEL_NAMES,
         ):
             return
-        await ctx.send(embed=embed.playerlist(self.auction.players))
+        await self.send_playerlist(ctx)
 
     @commands.command()
     async def captainlist(self, ctx):
@@ -429,7 +863,7 @@ class AuctionBot(commands.Cog):
             channel_names=GENERIC_DRAFT_CHANNEL_NAMES,
         ):
             return
-        await ctx.send(embed=embed.captainlist(self.auction.captains))
+        await self.say(ctx, embed=embed.captainlist(self.auction.captains, auction=self.auction))
 
     @commands.command()
     async def playerinfo(self, ctx):
@@ -441,7 +875,7 @@ class AuctionBot(commands.Cog):
             channel_names=GENERIC_DRAFT_CHANNEL_NAMES,
         ):
             return
-        await ctx.send(embed=embed.player_info(self.auction.search_player(ctx.message)))
+        await self.say(ctx, embed=embed.player_info(self.auction.search_player(ctx.message)))
 
     @commands.command()
     async def player(self, ctx):
@@ -454,11 +888,11 @@ class AuctionBot(commands.Cog):
         ):
             return
         try:
-            self.auction.player(ctx.message)
+            await self.apply(self.auction.player, ctx.message, message=ctx.message)
             await ctx.message.add_reaction(self.emojis["plus"])
         except AuctionValidationError as e:
             if e.client_message.type == ClientMessageType.CHANNEL_MESSAGE:
-                await ctx.send(e.client_message.data)
+                await self.say(ctx, e.client_message.data)
                 await ctx.message.add_reaction(self.emojis["minus"])
 
     @commands.command()
@@ -472,11 +906,11 @@ class AuctionBot(commands.Cog):
         ):
             return
         try:
-            self.auction.captain(ctx.message)
+            await self.apply(self.auction.captain, ctx.message, message=ctx.message)
             await ctx.message.add_reaction(self.emojis["plus"])
         except AuctionValidationError as e:
             if e.client_message.type == ClientMessageType.CHANNEL_MESSAGE:
-                await ctx.send(e.client_message.data)
+                await self.say(ctx, e.client_message.data)
                 await ctx.message.add_reaction(self.emojis["minus"])
 
     @commands.command()
@@ -489,8 +923,8 @@ class AuctionBot(commands.Cog):
             channel_names=GENERIC_DRAFT_CHANNEL_NAMES,
         ):
             return
-        self.auction.bootstrap_from_testlists()
-        await ctx.send("Test lists uploaded")
+        await self.apply(self.auction.bootstrap_from_testlists, message=ctx.message)
+        await self.say(ctx, "Test lists uploaded")
 
     @commands.command()
     async def DELETE(self, ctx):
@@ -503,7 +937,7 @@ class AuctionBot(commands.Cog):
         ):
             return
 
-        await ctx.send("Are you sure you want to delete the database? y or n.")
+        await self.say(ctx, "Are you sure you want to delete the database? y or n.")
 
         def check(msg):
             return (
@@ -514,10 +948,10 @@ class AuctionBot(commands.Cog):
 
         msg = await client.wait_for("message", check=check)
         if msg.content.lower() == "y":
-            self.auction.delete_db()
-            await ctx.send("Database deleted.")
+            await self.apply(self.auction.delete_db, message=msg)
+            await self.say(ctx, "Database deleted.")
         elif msg.content.lower() == "n":
-            await ctx.send("Databases not deleted.")
+            await self.say(ctx, "Databases not deleted.")
     
     @commands.command()
     async def teams(self, ctx):
@@ -529,11 +963,11 @@ class AuctionBot(commands.Cog):
             channel_names=GENERIC_DRAFT_CHANNEL_NAMES,
         ):
             return
-        teams = self.auction.get_current_teams()
-        for captains, players in teams.items():
-            captain = self.auction.search_captain(captains)
-            bank = captain["dollars"]
-            await ctx.send(embed = embed.display_team(captains, bank, players))
+        for captain_name, roster in self.auction.rosters.items():
+            bank = self.auction.search_captain(captain_name)["dollars"]
+            await self.say(
+                ctx, embed=embed.display_team(captain_name, bank, roster, auction=self.auction)
+            )
     
     @commands.command()
     async def undo(self, ctx):
@@ -545,7 +979,7 @@ class AuctionBot(commands.Cog):
             channel_names=GENERIC_DRAFT_CHANNEL_NAMES,
         ):
             return
-        await ctx.send("Are you sure you want to revert the last nomination?")
+        await self.say(ctx, "Are you sure you want to revert the last nomination?")
 
         def check(msg):
             return (
@@ -556,14 +990,36 @@ class AuctionBot(commands.Cog):
         msg = await client.wait_for("message", check=check)
 
         if msg.content.lower() == "y":
-            self.auction.pop_recent_nomination()
-            await ctx.send("Nomination reverted.")
+            await self.apply(self.auction.pop_recent_nomination, message=msg)
+            await self.say(ctx, "Nomination reverted.")
         elif msg.content.lower() == "n":
-            await ctx.send("Nomination not reverted.")
+            await self.say(ctx, "Nomination not reverted.")
 
             
 if __name__ == "__main__":
-    client.add_cog(AuctionBot(client))
+    auction_bot = AuctionBot(client)
+    client.add_cog(auction_bot)
+    # Serves /healthz, /state and /metrics on the bot's loop once it runs;
+    # client.run cancels and awaits it on the way out
+    client.loop.create_task(auction_bot.serve_status())
 
     # BOT TOKEN
-    client.run(os.getenv("DISCORD_AUTH_TOKEN"))
\ No newline at end of file
+    client.run(os.getenv("DISCORD_AUTH_TOKEN"))
+
+    # Write out whatever is still buffered once the client has shut down
+    auction_bot.flush_db.cancel()
+    # Let an in-flight background batch land before the final, newer flush
+    if auction_bot.async_store is not None:
+        auction_bot.async_store.close()
+    auction_bot.auction.flush()
+    print(f"Storage stats: {auction_bot.auction.db.stats()}")
+    print(f"Actor stats: {auction_bot.actor.stats()}")
+    print(f"Outbound stats: {auction_bot.outbound.stats()}")
+    print(f"Member index stats: {member_index.stats()}")
+    print(f"Whitelist timings: {auction_bot.whitelist_stats()}")
+    print(f"Purge stats: {auction_bot.purge.stats()}")
+    if auction_bot.board is not None:
+        print(f"Board stats: {auction_bot.board.stats()}")
+    if auction_bot.status_server is not None:
+        print(f"Status server stats: {auction_bot.status_server.stats()}")
+    stop_event_log()
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Ack latency of bids applied through the AuctionActor during a bidding war.
+
+Run from the repo root with `python benchmarks/bench_actor.py`. Each burst
+submits that many !bid commands at once (the way a bidding war lands from
+the gateway) and reports how long the last one waited for its result, along
+with the actor's own queue depth and service time.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from actor import AuctionActor, snowflake_at
+from draft import ADMIN_IDS, Auction
+
+BURSTS = [1, 10, 100]
+
+
+def build_auction():
+    auction = Auction(db={})
+    for i in range(10):
+        auction.addCaptain(f"Captain {i}", 100000)
+    auction.addPlayer("toth", 5000)
+    admin = mock.Mock(id=ADMIN_IDS[0])
+    auction.start(message=mock.Mock(content="!start", author=admin))
+    auction.machine.nom_from_start()
+    auction.nominate(message=mock.Mock(content="!nominate toth Captain 0", author=admin))
+    auction.machine.buff_from_nom()
+    auction.machine.bid_from_buff()
+    return auction, admin
+
+
+async def burst(actor, auction, admin, size, amount):
+    now = time.time()
+    start = time.perf_counter()
+    futures = []
+    for i in range(size):
+        message = mock.Mock(
+            id=snowflake_at(now) + i,
+            content=f"!bid {amount + i} Captain {i % 10}",
+            author=admin,
+        )
+        futures.append(actor.submit(auction.bid, message, snowflake=message.id))
+    # Rejected bids (e.g. too low) are acked too, so they count the same
+    await asyncio.gather(*futures, return_exceptions=True)
+    return time.perf_counter() - start
+
+
+async def main():
+    logging.getLogger("transitions").setLevel(logging.WARNING)
+    auction, admin = build_auction()
+    actor = AuctionActor()
+    amount = 1
+    for size in BURSTS:
+        actor.reset_peaks()
+        elapsed = await burst(actor, auction, admin, size, amount)
+        amount += size
+        stats = actor.stats()
+        print(
+            f"{size:>4} bids: last ack {elapsed * 1e3:7.2f} ms, "
+            f"max depth {stats['max_depth']:>4}, "
+            f"mean service {stats['mean_service_time'] * 1e6:7.1f} us, "
+            f"max service {stats['max_service_time'] * 1e6:7.1f} us"
+        )
+    await actor.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Recovery time of a journaled Auction after a 500-lot draft.
+
+Run from the repo root with `python benchmarks/bench_journal_recovery.py`.
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import draft
+from draft import Auction, ADMIN_IDS
+from journal import FileJournal
+
+LOTS = 500
+CAPTAINS = 50
+BIDS_PER_LOT = 6
+ADMIN = mock.Mock(id=ADMIN_IDS[0])
+
+
+def run_draft(journal_dir, snapshot_every):
+    auction = Auction(db={}, journal=FileJournal(journal_dir, snapshot_every=snapshot_every))
+    for i in range(CAPTAINS):
+        auction.addCaptain(f"captain{i}", 100000)
+    for i in range(LOTS):
+        auction.addPlayer(f"player{i}", 1000 + i)
+    auction.start(mock.Mock(content="!start", author=ADMIN))
+
+    for lot in range(LOTS):
+        nominator = f"captain{lot % CAPTAINS}"
+        auction.nominate(mock.Mock(content=f"!nominate player{lot} {nominator}", author=ADMIN))
+        auction.machine.buff_from_nom()
+        auction.machine.bid_from_buff()
+        for bid in range(BIDS_PER_LOT):
+            bidder = f"captain{(lot + bid) % CAPTAINS}"
+            auction.bid(mock.Mock(content=f"!bid {10 + bid} {bidder}", author=ADMIN))
+        for _ in auction.run_current_lot():
+            pass
+        auction.give_lot_to_winner()
+    auction.journal.close()
+
+
+def main():
+    logging.getLogger("transitions").setLevel(logging.WARNING)
+    # Captains keep bidding long after a real team would be full
+    draft.TEAM_SIZE = LOTS
+    for snapshot_every in [100000, 1000, 200]:
+        with tempfile.TemporaryDirectory() as journal_dir:
+            run_draft(journal_dir, snapshot_every)
+            journal_size = os.path.getsize(os.path.join(journal_dir, "journal.jsonl"))
+
+            start = time.perf_counter()
+            recovered = Auction(db={}, journal=FileJournal(journal_dir, snapshot_every=snapshot_every))
+            elapsed = time.perf_counter() - start
+            assert len(recovered.nominations) == LOTS
+            print(
+                f"snapshot every {snapshot_every:>6} events: recovered {LOTS} lots in "
+                f"{elapsed * 1e3:6.1f} ms (journal tail {journal_size / 1024:7.1f} KiB)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Cost of logging a command on the event loop.
+
+Run from the repo root with `python benchmarks/bench_logging.py`. "inline" is
+the old path (timestamp, json.dumps and a flushed file write per command);
+"queued" is log_utils.log_command, which only hands the record to the
+listener thread. The time to drain the queue afterwards is reported too.
+"""
+import datetime
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import log_utils
+
+COMMANDS = 20000
+
+
+def main():
+    # A plain object rather than a Mock, so the mock isn't what gets measured
+    ctx = type("Ctx", (), {"message": type("Message", (), {
+        "author": type("Author", (), {"name": "Cev"}), "content": "!bid 200",
+    })})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inline_log = logging.Logger("inline")
+        handler = logging.FileHandler(os.path.join(tmp, "inline.log"))
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        inline_log.addHandler(handler)
+
+        start = time.perf_counter()
+        for _ in range(COMMANDS):
+            payload = OrderedDict(
+                timestamp=datetime.datetime.now().isoformat(),
+                author=ctx.message.author.name,
+                message=str(ctx.message.content),
+            )
+            inline_log.info(json.dumps(payload))
+        inline = (time.perf_counter() - start) / COMMANDS
+        handler.close()
+
+        log_utils.stop_event_log()
+        log_utils.start_event_log(os.path.join(tmp, "events.log"))
+        # Keep the benchmark's lines off the terminal
+        listener = log_utils.event_listener
+        listener.handlers = tuple(h for h in listener.handlers if isinstance(h, logging.FileHandler))
+
+        start = time.perf_counter()
+        for _ in range(COMMANDS):
+            log_utils.log_command(ctx)
+        queued = (time.perf_counter() - start) / COMMANDS
+        start = time.perf_counter()
+        log_utils.stop_event_log()
+        drain = time.perf_counter() - start
+
+    print(
+        f"{COMMANDS} commands: inline {inline * 1e6:6.2f} us/command, "
+        f"queued {queued * 1e6:5.2f} us/command, drain {drain * 1000:6.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
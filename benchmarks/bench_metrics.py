@@ -0,0 +1,37 @@
+"""Cost of recording metrics on the bid path, and of rendering a scrape.
+
+Run from the repo root with `python benchmarks/bench_metrics.py`. A bid
+records a command count, a command latency and an ack latency, each timed
+with perf_counter; that is what "per bid" measures.
+"""
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import metrics
+
+BIDS = 100000
+
+
+def record_bid():
+    received = time.perf_counter()
+    metrics.BID_ACK_LATENCY.observe(time.perf_counter() - received, "accepted")
+    metrics.COMMANDS.inc("bid", "ok")
+    metrics.COMMAND_LATENCY.observe(time.perf_counter() - received, "bid")
+
+
+def main():
+    per_bid = timeit.timeit(record_bid, number=BIDS) / BIDS
+    observe = timeit.timeit(lambda: metrics.LOOP_LAG.observe(0.003), number=BIDS) / BIDS
+    render = timeit.timeit(metrics.render, number=100) / 100
+    print(
+        f"per bid {per_bid * 1e6:5.2f} us, one observe {observe * 1e6:5.2f} us, "
+        f"render {render * 1000:5.2f} ms ({len(metrics.render().splitlines())} lines)"
+    )
+
+
+if __name__ == "__main__":
+    main()
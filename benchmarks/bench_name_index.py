@@ -0,0 +1,44 @@
+"""Lookup cost of Auction.search_player / search_captain as the pool grows.
+
+Run from the repo root with `python benchmarks/bench_name_index.py`. The
+per-lookup time should stay roughly flat from 50 to 5000 players.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from draft import Auction
+
+POOL_SIZES = [50, 500, 5000]
+LOOKUPS = 2000
+
+
+def build_auction(n_players):
+    auction = Auction(db={})
+    for i in range(20):
+        auction.addCaptain(f"Captain {i}", 1000)
+    for i in range(n_players):
+        auction.addPlayer(f"Player {{{i}}} the Messy", 4000 + i)
+    return auction
+
+
+def main():
+    for n_players in POOL_SIZES:
+        build_time = timeit.timeit(lambda: build_auction(n_players), number=1)
+        auction = build_auction(n_players)
+        # Worst case for the old linear scan: the last player in the list,
+        # looked up by a differently formatted version of its name.
+        name = f"player {n_players - 1} the messy"
+        per_lookup = timeit.timeit(lambda: auction.search_player(name), number=LOOKUPS) / LOOKUPS
+        per_miss = timeit.timeit(lambda: auction.search_captain("nobody"), number=LOOKUPS) / LOOKUPS
+        print(
+            f"{n_players:>5} players: bootstrap {build_time * 1e3:8.1f} ms, "
+            f"search_player {per_lookup * 1e6:6.1f} us, "
+            f"search_captain miss {per_miss * 1e6:6.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Latency of Auction.parse_message_for_names for !nominate messages.
+
+Run from the repo root with `python benchmarks/bench_nomination_parser.py`.
+"""
+import os
+import sys
+import timeit
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from draft import Auction
+
+POOL_SIZES = [50, 500, 5000]
+RUNS = 2000
+
+
+def build_auction(n_players):
+    auction = Auction(db={})
+    for i in range(20):
+        auction.addCaptain(f"Vuvuzela Virtuoso {i}", 1000)
+    for i in range(n_players):
+        auction.addPlayer(f"Linkdx {{noflamevow}} {i}", 4000 + i)
+    return auction
+
+
+def main():
+    for n_players in POOL_SIZES:
+        auction = build_auction(n_players)
+        messages = {
+            "player + captain": f"!nominate linkdx noflamevow {n_players - 1} Vuvuzela Virtuoso 19",
+            "player only": f"!nominate Linkdx {{noflamevow}} {n_players - 1}",
+            "long garbage": "!nominate " + " ".join(["linkdx", "{noflamevow}"] + ["spam"] * 40),
+        }
+        results = []
+        for label, content in messages.items():
+            message = mock.Mock(content=content)
+            per_call = timeit.timeit(lambda: auction.parse_message_for_names(message), number=RUNS) / RUNS
+            results.append(f"{label} {per_call * 1e6:6.1f} us")
+        print(f"{n_players:>5} players: " + ", ".join(results))
+
+
+if __name__ == "__main__":
+    main()
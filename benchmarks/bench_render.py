@@ -0,0 +1,52 @@
+"""Cost of rendering the player list between picks, and of a pick itself.
+
+Run from the repo root with `python benchmarks/bench_render.py`. "uncached"
+is the old path (filter and sort every player on every render); "cached"
+renders from the sorted pool with the auction's version, so repeat renders
+between picks are a dict lookup.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import embed
+from draft import Auction
+
+POOL_SIZES = [50, 500, 5000]
+RENDERS = 200
+
+
+def build_auction(n_players):
+    auction = Auction(db={})
+    for i in range(n_players):
+        auction.addPlayer(f"Player {i}", 3000 + (i * 37) % 2000)
+    return auction
+
+
+def main():
+    for n_players in POOL_SIZES:
+        auction = build_auction(n_players)
+        uncached = timeit.timeit(lambda: embed.playerlist(auction.players), number=RENDERS) / RENDERS
+        cached = timeit.timeit(
+            lambda: embed.playerlist(auction=auction),
+            number=RENDERS,
+        ) / RENDERS
+        player = auction.players[n_players // 2]
+
+        def pick_and_undo():
+            player["is_picked"] = True
+            auction.player_pool.remove(player)
+            player["is_picked"] = False
+            auction.player_pool.add(player)
+
+        pick = timeit.timeit(pick_and_undo, number=RENDERS) / RENDERS
+        print(
+            f"{n_players:>5} players: uncached render {uncached * 1e6:8.1f} us, "
+            f"cached render {cached * 1e6:6.2f} us, pick + undo {pick * 1e6:6.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Persistence cost of a draft on the key-value store vs the SQLite store.
+
+Run from the repo root with `python benchmarks/bench_storage.py`. The
+key-value db here serializes every write like replit's does but skips the
+network, so its numbers are a lower bound for the real replit store.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import draft
+from draft import Auction, ADMIN_IDS
+from storage import SQLiteStore
+
+PLAYERS = 500
+CAPTAINS = 50
+LOTS = 200
+ADMIN = mock.Mock(id=ADMIN_IDS[0])
+
+
+class SerializingDB(dict):
+    def __init__(self):
+        super().__init__()
+        self.puts = 0
+        self.bytes_written = 0
+
+    def __setitem__(self, key, value):
+        payload = json.dumps(value)
+        self.puts += 1
+        self.bytes_written += len(payload)
+        super().__setitem__(key, json.loads(payload))
+
+
+def run_draft(auction):
+    for i in range(CAPTAINS):
+        auction.addCaptain(f"captain{i}", 100000)
+    for i in range(PLAYERS):
+        auction.addPlayer(f"player{i}", 1000 + i)
+    auction.start(mock.Mock(content="!start", author=ADMIN))
+    for lot in range(LOTS):
+        auction.nominate(mock.Mock(content=f"!nominate player{lot} captain{lot % CAPTAINS}", author=ADMIN))
+        auction.machine.buff_from_nom()
+        auction.machine.bid_from_buff()
+        auction.bid(mock.Mock(content=f"!bid 10 captain{(lot + 1) % CAPTAINS}", author=ADMIN))
+        for _ in auction.run_current_lot():
+            pass
+        auction.give_lot_to_winner()
+    auction.flush()
+
+
+def main():
+    logging.getLogger("transitions").setLevel(logging.WARNING)
+    draft.TEAM_SIZE = LOTS
+
+    db = SerializingDB()
+    auction = Auction(db=db)
+    start = time.perf_counter()
+    run_draft(auction)
+    elapsed = time.perf_counter() - start
+    print(
+        f"key-value (write-behind): {elapsed * 1e3:7.1f} ms, {db.puts} PUTs, "
+        f"{db.bytes_written / 1024:8.1f} KiB written, {auction.db.writes_avoided} writes avoided"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStore(os.path.join(directory, "draft.db"))
+        auction = Auction(db=store)
+        start = time.perf_counter()
+        run_draft(auction)
+        elapsed = time.perf_counter() - start
+        print(f"sqlite:                   {elapsed * 1e3:7.1f} ms, {store.statements} statements")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
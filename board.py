@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+BOARD_EDIT_INTERVAL = 0.5  # seconds between edits, at most
+
+
+class AuctionBoard:
+    """A single pinned message showing the state of the draft.
+
+    refresh() only marks the board dirty; a background task re-renders it at
+    most once per interval and edits the message only if the rendered embed
+    actually changed. Any number of refreshes in between cost one render.
+    """
+
+    def __init__(self, render, send, interval=BOARD_EDIT_INTERVAL, clock=time.monotonic):
+        self.render = render
+        self.send = send
+        self.interval = interval
+        self.clock = clock
+        self.message = None
+        self.last_rendered = None
+        self.edited_at = None
+        self.dirty = asyncio.Event()
+        self.task = None
+
+        self.renders = 0
+        self.edits = 0
+
+    def refresh(self):
+        self.dirty.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            await self.dirty.wait()
+            if self.edited_at is not None:
+                wait = self.edited_at + self.interval - self.clock()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self.dirty.clear()
+            try:
+                await self.update()
+            except Exception as e:
+                print(f"Failed to update the auction board: {e!r}")
+                self.edited_at = self.clock()
+
+    async def update(self):
+        embed = self.render()
+        self.renders += 1
+        rendered = embed.to_dict()
+        if rendered == self.last_rendered:
+            return False
+        if self.message is None:
+            self.message = await self.send(embed=embed)
+            try:
+                await self.message.pin()
+            except Exception as e:
+                # Missing Manage Messages; the board still works unpinned
+                print(f"Couldn't pin the auction board: {e!r}")
+        else:
+            await self.message.edit(embed=embed)
+        self.last_rendered = rendered
+        self.edited_at = self.clock()
+        self.edits += 1
+        return True
+
+    def stats(self):
+        return dict(renders=self.renders, edits=self.edits)
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
@@ -3,7 +3,14 @@ import uuid
 import slugify
 
 from collections import namedtuple
+from actor import snowflake_time
+from journal import open_journal_from_env
 from lot import Lot
+from name_index import FuzzyIndex, NameIndex
+from player_pool import PlayerPool
+from rosters import RosterIndex
+from scheduler import NominationScheduler
+from storage import MemoryStore, Store, WriteBehindStore, open_store_from_env
 import playerlist_util
 from log_utils import log_state_transition
 
@@ -20,6 +27,8 @@ Nomination = namedtuple(
     ["lot_id", "player_name", "player_mmr", "nominator", "captain", "amount_paid"],
 )
 
+TEAM_SIZE = 4
+
 ADMIN_IDS = [
     411342580887060480,  # toth
     901244331904622592,  # AuctionBot
@@ -48,18 +57,28 @@ class BidAgainstSelfError(AuctionValidationError):
     pass
 
 
+class LateBidError(AuctionValidationError):
+    pass
+
+
 class Auction:
-    def __init__(self, db=None):
+    def __init__(self, db=None, journal=None):
         self.debug = False
-        if db is not None:
-            self.db = db
-        else:
+        # When a journal is given it is the source of truth for the draft and
+        # no db is used at all.
+        self.journal = journal
+        if journal is not None:
+            db = MemoryStore()
+        elif db is None:
             # This is kinda bad, doing the local import here, but if you import
             # at top of file (before you load the dotenv) then the db wont be
             # initialized
             from replit import db as replit_db
 
-            self.db = replit_db
+            db = replit_db
+        if not isinstance(db, Store):
+            db = WriteBehindStore(db)
+        self.db = db
 
         self.states = [
             "asleep",
@@ -72,7 +91,10 @@ class Auction:
             "break"
         ]
         
-        self.machine = Machine(states=self.states, initial="asleep")
+        # Every state transition is a durability barrier for buffered writes
+        self.machine = Machine(
+            states=self.states, initial="asleep", after_state_change=self.on_state_change
+        )
         self.machine.add_transition("start_machine", "asleep", "starting")
         self.machine.add_transition("nom_from_start", "starting", "nominating")
         self.machine.add_transition("bid_from_nom", "nominating", "bidding")
@@ -88,8 +110,25 @@ class Auction:
         self.players = []
         self.bids = []
         self.nominations = []
+        self.captain_index = NameIndex()
+        self.player_index = NameIndex()
+        self.player_fuzzy_index = FuzzyIndex()
+        self.rosters = RosterIndex()
+        self.player_pool = PlayerPool()
+        # Bumped whenever captains, players or rosters change, so anything
+        # rendered from them can be reused until the next change
+        self.version = 0
+        # Embeds rendered from this draft, keyed by what they show; see embed._cached
+        self.render_cache = {}
+        self.scheduler = NominationScheduler()
+        # Scheduler cursor from before each award, so undo can put it back
+        self.award_cursors = {}
+        # Round the latest award was made in, see is_end_of_round
+        self.award_round = None
 
         self.current_lot = None
+        # The bot sets this to push flushes off the event loop, see AsyncStore
+        self.flush_in_background = None
         self.populate_from_db()
 
         self.starting_ctx = None
@@ -98,53 +137,223 @@ class Auction:
         log_state_transition(start_state="asleep", end_state="starting")
 
     def populate_from_db(self):
-        if "captains" in self.db.keys():
+        if self.journal is not None:
+            self.populate_from_journal()
+            return
+
+        keys = self.db.keys()
+        if "captains" in keys:
             self.captains = self.db["captains"]
-        if "players" in self.db.keys():
+        if "players" in keys:
             self.players = self.db["players"]
-        if "bids" in self.db.keys():
+        if "bids" in keys:
             self.bids = self.db["bids"]
-        if "nominations" in self.db.keys():
-            self.nominations = self.db["nominations"]
+        if "nominations" in keys:
+            # Nominations come back from the db as plain lists
+            self.nominations = [Nomination(*n) for n in self.db["nominations"]]
+        if "nomination_schedule" in keys:
+            self.scheduler = NominationScheduler.from_dict(self.db["nomination_schedule"])
+        self.rebuild_indexes()
+
+    def populate_from_journal(self):
+        state, events = self.journal.load()
+        if state is not None:
+            self.restore_snapshot(state)
+        self.rebuild_indexes()
+        for event in events:
+            self.apply_event(event)
+
+    def rebuild_indexes(self):
+        self.captain_index.rebuild(self.captains)
+        self.rebuild_player_indexes()
+        self.rosters.rebuild(self.nominations)
+        self.version += 1
+
+    def snapshot_state(self):
+        return dict(
+            captains=self.captains,
+            players=self.players,
+            nominations=[list(n) for n in self.nominations],
+            schedule=self.scheduler.to_dict(),
+            award_cursors=self.award_cursors,
+            current_lot=self.current_lot.to_dict() if self.current_lot else None,
+        )
+
+    def state_key(self):
+        """Changes whenever state_snapshot() would.
+
+        version covers captains, players and awards; the machine state and
+        the current lot's bids move without it.
+        """
+        lot = self.current_lot
+        if lot is None:
+            return (self.version, self.machine.state, None)
+        return (self.version, self.machine.state, id(lot), len(lot.current_bids), lot.is_paused, lot.closing)
+
+    def state_snapshot(self):
+        """A JSON-ready view of the draft for dashboards."""
+        lot = self.current_lot
+        captains = []
+        for captain in self.captains:
+            roster = self.rosters.get(captain["name"])
+            picks = roster.nominations if roster else []
+            captains.append(dict(
+                name=captain["name"],
+                dollars=captain["dollars"],
+                roster=[dict(player=n.player_name, amount_paid=n.amount_paid) for n in picks],
+            ))
+        return dict(
+            state=self.machine.state,
+            version=self.version,
+            captains=captains,
+            current_lot=None if lot is None else dict(
+                player=lot.player,
+                nominator=lot.nominator,
+                bids=lot.current_bids,
+                high_bid=lot.max_bid,
+                paused=lot.is_paused,
+                closing=lot.closing,
+            ),
+            picks=len(self.nominations),
+            players_left=len(self.player_pool),
+        )
+
+    def restore_snapshot(self, state):
+        self.captains = state["captains"]
+        self.players = state["players"]
+        self.nominations = [Nomination(*n) for n in state["nominations"]]
+        self.scheduler = NominationScheduler.from_dict(state["schedule"])
+        self.award_cursors = state["award_cursors"]
+        self.current_lot = None
+        if state["current_lot"] is not None:
+            self.current_lot = Lot.from_dict(state["current_lot"])
+
+    def apply_event(self, event):
+        kind, data = event["kind"], event["data"]
+        if kind == "captain_added":
+            self.captains.append(data["captain"])
+            self.captain_index.add(data["captain"]["name"], data["captain"])
+            self.version += 1
+        elif kind == "player_added":
+            self.players.append(data["player"])
+            self._index_player(data["player"])
+            self.player_pool.add(data["player"])
+            self.version += 1
+        elif kind == "draft_started":
+            self.scheduler = NominationScheduler(order=data["order"])
+        elif kind == "lot_opened":
+            self.current_lot = Lot(data["player"], data["nominator"])
+        elif kind == "bid_accepted":
+            self.current_lot.add_bid(data["bid"])
+        elif kind == "lot_awarded":
+            self._apply_award(Nomination(*data["nomination"]), data["cursor"])
+        elif kind == "nomination_undone":
+            self._apply_undo(data["lot_id"], data["cursor"])
+        else:
+            print(f"Unknown journal event {kind}, skipping")
+
+    def _record(self, kind, **data):
+        if self.journal is None:
+            return
+        self.journal.append(kind, data)
+        if self.journal.should_snapshot():
+            self.journal.write_snapshot(self.snapshot_state())
+
+    def _snapshot(self):
+        if self.journal is not None:
+            self.journal.write_snapshot(self.snapshot_state())
 
     def persist_key(self, key):
+        if self.journal is not None:
+            return
         self.db[key] = getattr(self, key)
 
+    def persist_record(self, key, record, change="update"):
+        """Persists a change to one entry of the `key` list.
+
+        change is "update", "append" or "remove"; stores with real tables only
+        write that one row, key-value stores write the whole list.
+        """
+        if self.journal is not None:
+            return
+        persist = getattr(self.db, f"{change}_record")
+        persist(key, record, getattr(self, key))
+
+    def flush(self):
+        return self.db.flush()
+
+    def on_state_change(self, *args, **kwargs):
+        if self.flush_in_background is not None:
+            self.flush_in_background()
+        else:
+            self.flush()
+
+    def persist_schedule(self):
+        if self.journal is not None:
+            return
+        self.db["nomination_schedule"] = self.scheduler.to_dict()
+
     def delete_db(self):
-        for key in ["captains", "players", "bids", "captain_nominate_order", "nominations"]:
-            try:
-                setattr(self, key, [])
-                del self.db[key]
-            except KeyError:
-                pass
+        for key in ["captains", "players", "bids", "nominations"]:
+            setattr(self, key, [])
+        if self.journal is None:
+            # captain_nominate_order is the pre-scheduler format, clear it out too
+            for key in ["captains", "players", "bids", "nominations", "nomination_schedule",
+                        "captain_nominate_order"]:
+                try:
+                    del self.db[key]
+                except KeyError:
+                    pass
+        self.scheduler = NominationScheduler()
+        self.award_cursors = {}
+        self.award_round = None
+        self.captain_index.clear()
+        self.player_index.clear()
+        self.player_fuzzy_index.clear()
+        self.player_pool.rebuild([])
+        self.rosters.rebuild([])
+        self.version += 1
+        if self.journal is not None:
+            self.journal.reset()
 
     def addCaptain(self, name, dollars):
         if self.search_captain(name):
             return False
         captain = {"name": name, "dollars": dollars, "slug": slugify.slugify(name)}
         self.captains.append(captain)
-        self.db["captains"] = self.captains
+        self.captain_index.add(name, captain)
+        self.version += 1
+        self.persist_record("captains", captain, "append")
+        self._record("captain_added", captain=captain)
         return True
 
     def search_captain(self, name):
-        for captain in self.captains:
-            if captain["name"].lower() == name.lower():
-                return captain
-            if slugify.slugify(captain["name"].lower()) == slugify.slugify(name).lower():
-                return captain
-        return None
+        return self.captain_index.get(name)
 
     def search_player(self, name):
+        return self.player_index.get(name)
+
+    def suggest_players(self, name, limit=3):
+        return [player for _, player in self.player_fuzzy_index.suggest(name, limit)]
+
+    def _index_player(self, player):
+        for name in [player["name"]] + player.get("nicknames", []):
+            self.player_index.add(name, player)
+            self.player_fuzzy_index.add(name, player)
+
+    def rebuild_player_indexes(self):
+        self.player_index.clear()
+        self.player_fuzzy_index.clear()
         for player in self.players:
-            if player["name"] == name:
-                return player
-            if slugify.slugify(player["name"]) == slugify.slugify(name):
-                return player
-        return None
+            self._index_player(player)
+        self.player_pool.rebuild(self.players)
         
     def clearCaptains(self):
         self.captains = []
-        self.db["captains"] = self.captains
+        self.captain_index.clear()
+        self.version += 1
+        self.persist_key("captains")
+        self._snapshot()
 
     def addPlayer(
         self,
@@ -161,6 +370,7 @@ class Auction:
         pos5="",
         hero_drafter="",
         is_picked=False,
+        nicknames=None,
     ):
         if self.checkPlayer(name):
             return False
@@ -176,28 +386,36 @@ class Auction:
             "pos4": pos4,
             "pos5": pos5,
             "is_picked": is_picked,
+            "nicknames": nicknames or [],
         }
         self.players.append(player)
-        self.db["players"] = self.players
+        self._index_player(player)
+        if not is_picked:
+            self.player_pool.add(player)
+        self.version += 1
+        self.persist_record("players", player, "append")
+        self._record("player_added", player=player)
         return True
 
     def removePlayer(self, name):
         # TODO: This function clearly does not work
         if self.checkPlayer(name):
             self.players.remove()
-            self.db["players"] = self.players
+            self.persist_key("players")
             return True
         return False
 
     def checkPlayer(self, name):
-        for player in self.players:
-            if player["name"].lower() == name.lower():
-                return True
-        return False
+        return name in self.player_index
 
     def clearPlayers(self):
         self.players = []
-        self.db["players"] = self.players
+        self.player_index.clear()
+        self.player_fuzzy_index.clear()
+        self.player_pool.rebuild([])
+        self.version += 1
+        self.persist_key("players")
+        self._snapshot()
 
     def is_admin(self, message):
         if message.author.id in ADMIN_IDS or self.debug:
@@ -205,22 +423,29 @@ class Auction:
         return False
 
     def get_next_captain(self):
-        if not self.db["captain_nominate_order"]:
+        cursor = self.scheduler.cursor
+        name = self.scheduler.next_eligible(self.captain_has_full_team)
+        if self.scheduler.cursor != cursor:
+            self.persist_schedule()
+        if name is None:
             return None
-        full_captains = set()
-        while self.db["captain_nominate_order"]:
-            captain = self.db["captain_nominate_order"][0]
-            if not self.captain_has_full_team(captain['name']):
-                return captain
-            self.pop_captain_from_nominate_order()
-            full_captains.add(captain['name'])
-
-            if len(list(full_captains)) == len(self.captains):
-                return None
+        return self.search_captain(name)
+
+    def is_end_of_round(self):
+        """Whether the latest award finished its round; answers once per award.
+
+        Full teams are skipped first, since skipping them can carry the
+        cursor over the end of the round just as well as the award itself.
+        """
+        if self.award_round is None:
+            return False
+        award_round, self.award_round = self.award_round, None
+        if self.get_next_captain() is None:
+            return False
+        return self.scheduler.round > award_round
 
     def captain_has_full_team(self, captain_name):
-        teams = self.get_current_teams()
-        return len(teams.get(captain_name, [])) == 4
+        return self.rosters.count(captain_name) >= TEAM_SIZE
 
     def bootstrap_from_testlists(self):
         playerlist = playerlist_util.parse_playerlist_csv("test_playerlist.csv")
@@ -244,6 +469,7 @@ class Auction:
                 player["pos5"],
                 player["hero_drafter"],
                 is_picked=False,
+                nicknames=player.get("nicknames"),
             )
 
     def bootstrap_lists(self):
@@ -264,17 +490,21 @@ class Auction:
                 pos4=player["pos4"],
                 pos5=player["pos5"],
                 is_picked=False,
+                nicknames=player.get("nicknames"),
             )
 
-    def populate_captain_nominate_order(self):
-        captains = sorted(self.db["captains"], key=lambda x: x["dollars"], reverse=True)
-        if "captain_nominate_order" not in self.db or not self.db["captain_nominate_order"]:
-            self.db["captain_nominate_order"] = captains * 20
+    def populate_nomination_schedule(self):
+        if self.scheduler.order:
+            return
+        captains = sorted(self.captains, key=lambda x: x["dollars"], reverse=True)
+        self.scheduler = NominationScheduler(order=[c["name"] for c in captains])
+        self.persist_schedule()
+        self._record("draft_started", order=self.scheduler.order)
 
     def start(self, message):
         if self.is_admin(message):
             self.machine.start_machine()
-            self.populate_captain_nominate_order()
+            self.populate_nomination_schedule()
             return ClientMessage(
                 type=ClientMessageType.CHANNEL_MESSAGE,
                 data="Welcome to the Draft",
@@ -288,14 +518,11 @@ class Auction:
             )
 
     def autonominate(self, next_eligible_captain):
-        pickable_players = [
-            player for player in self.db["players"] if not player["is_picked"]
-        ]
-        players_by_mmr = sorted(pickable_players, key=lambda x: x["mmr"], reverse=True)
-        player_to_autonominate = players_by_mmr[0]
+        player_to_autonominate = self.player_pool.top()
         self.current_lot = Lot(
             player_to_autonominate["name"], next_eligible_captain["name"]
         )
+        self._record("lot_opened", player=self.current_lot.player, nominator=self.current_lot.nominator)
         return self.current_lot
 
     def _validate_captain(self, message):
@@ -365,6 +592,33 @@ class Auction:
             print(f"Received bid in state {self.machine.state}, ignoring")
             return
 
+        # Past the deadline the lot is closing even if the driver hasn't got
+        # to it yet; the bid is judged by when it was sent and must never
+        # push the deadline back out
+        if self.current_lot and self.current_lot.begin_close():
+            return self._hold_late_bid(message)
+        return self._accept_bid(message)
+
+    def _hold_late_bid(self, message):
+        # Judged by when the captain sent it, not when it got to us
+        if not self.current_lot.sent_in_time(snowflake_time(message.id)):
+            raise LateBidError(
+                ClientMessage(
+                    ClientMessageType.CHANNEL_MESSAGE,
+                    "Bid came in after the lot closed.",
+                )
+            )
+        if self._validate_captain(message) is None:
+            raise AuctionValidationError(
+                ClientMessage(
+                    ClientMessageType.REACT,
+                    "-",
+                )
+            )
+        self.current_lot.hold_late_bid(snowflake_time(message.id), message)
+        return 0
+
+    def _accept_bid(self, message):
         message_body = self.parse_message_for_names(message)
         captain = self._validate_captain(message)
         if captain is None:
@@ -385,7 +639,9 @@ class Auction:
             )
         if not self.current_lot:
             print("This shouldn't happen, in bidding state but no current lot")
-        time_remaining = self.current_lot.add_bid(dict(captain_name=captain["name"], amount=bid_amount, all_in=self.is_captain_all_in(bid_amount, captain)))
+        bid = dict(captain_name=captain["name"], amount=bid_amount, all_in=self.is_captain_all_in(bid_amount, captain))
+        time_remaining = self.current_lot.add_bid(bid)
+        self._record("bid_accepted", bid=bid)
         return time_remaining
 
     def nominate(self, message):
@@ -406,14 +662,26 @@ class Auction:
         if not self.machine.state == 'nominating':
             return    
 
-        if not message_body["player"]:
-            raise AuctionValidationError(
-                ClientMessage(
-                    type=ClientMessageType.CHANNEL_MESSAGE,
-                    data="That player is not in the system.",
+        if message_body["player"]:
+            player = self.search_player(message_body["player"])
+        else:
+            # Resolve typos here rather than making the captain retype while
+            # their nomination clock keeps running.
+            player = self.player_fuzzy_index.resolve(message_body["player_query"])
+            if player is None:
+                data = "That player is not in the system."
+                suggestions = self.suggest_players(message_body["player_query"])
+                if suggestions:
+                    names = ", ".join(p["name"] for p in suggestions)
+                    data += f" Did you mean: {names}?"
+                raise AuctionValidationError(
+                    ClientMessage(
+                        type=ClientMessageType.CHANNEL_MESSAGE,
+                        data=data,
+                    )
                 )
-            )
-        player = self.search_player(message_body['player'])
+            message_body["player"] = player["name"]
+
         if player['is_picked']:
             raise AuctionValidationError(
                 ClientMessage(
@@ -452,18 +720,14 @@ class Auction:
                 )
 
         self.current_lot = Lot(message_body["player"], nominated_on_behalf_of_captain)
+        self._record("lot_opened", player=self.current_lot.player, nominator=self.current_lot.nominator)
         return self.current_lot
 
     def clear_lot(self):
         self.current_lot = None
 
     def get_current_teams(self):
-        teams_by_captain_name = {}
-        for nomination in self.nominations:
-            nomination = Nomination(*nomination)
-            teams_by_captain_name.setdefault(nomination.captain, []).append(nomination)
-
-        return teams_by_captain_name
+        return self.rosters.teams()
 
     def give_lot_to_winner(self):
         winning_bid = self.current_lot.winning_bid
@@ -477,40 +741,87 @@ class Auction:
             nominator=self.current_lot.nominator,
             amount_paid=winning_bid["amount"],
         )
+        cursor = self.scheduler.cursor + 1
+        self._apply_award(nomination, cursor)
+        self._record("lot_awarded", nomination=list(nomination), cursor=cursor)
+        return nomination
+
+    def _apply_award(self, nomination, cursor):
+        self.award_cursors[nomination.lot_id] = self.scheduler.cursor
+        self.award_round = self.scheduler.round
+        self.scheduler.cursor = cursor
+        self.persist_schedule()
 
-        # Housekeeping
-        self.pop_captain_from_nominate_order()
-        captain["dollars"] -= winning_bid["amount"]
-        self.db["captians"] = self.captains
+        captain = self.search_captain(nomination.captain)
+        captain["dollars"] -= nomination.amount_paid
+        self.persist_record("captains", captain)
         self.nominations.append(nomination)
-        self.persist_key("nominations")
+        self.rosters.add(nomination)
+        self.persist_record("nominations", nomination, "append")
+        player = self.search_player(nomination.player_name)
         player["is_picked"] = True
-        self.persist_key("players")
+        self.player_pool.remove(player)
+        self.version += 1
+        self.persist_record("players", player)
 
         self.current_lot = None
 
-        return nomination
-
-    def pop_captain_from_nominate_order(self):
-        nominate_order = self.db["captain_nominate_order"]
-        nominate_order.pop(0)
-        self.db["captain_nominate_order"] = nominate_order
-
     def pop_recent_nomination(self, nomination_offset=0):
         if len(self.nominations) == 0:
             return None
-        nomination = self.nominations.pop(len(self.nominations) - 1 - nomination_offset)
-        self.persist_key("nominations")
+        nomination = self.nominations[len(self.nominations) - 1 - nomination_offset]
+        cursor_before_award = self.award_cursors.get(nomination.lot_id)
+        if nomination_offset == 0 and cursor_before_award is not None:
+            # Undoing the latest lot puts the schedule exactly where it was,
+            # including any full-team skips that happened since
+            cursor = cursor_before_award
+        else:
+            cursor = max(0, self.scheduler.cursor - 1)
+        self._apply_undo(nomination.lot_id, cursor)
+        self._record("nomination_undone", lot_id=nomination.lot_id, cursor=cursor)
+        return nomination
+
+    def _apply_undo(self, lot_id, cursor):
+        for i in range(len(self.nominations) - 1, -1, -1):
+            if self.nominations[i].lot_id == lot_id:
+                nomination = self.nominations.pop(i)
+                break
+        self.award_cursors.pop(lot_id, None)
+        self.award_round = None
+        self.rosters.remove(nomination)
+        self.persist_record("nominations", nomination, "remove")
 
         captain = self.search_captain(nomination.captain)
         captain["dollars"] += nomination.amount_paid
-        self.db["captains"] = self.captains
+        self.persist_record("captains", captain)
 
         player = self.search_player(nomination.player_name)
         player["is_picked"] = False
-        self.persist_key("players")
-        self.db["captain_nominate_order"].insert(0, captain)
-        return nomination
+        self.player_pool.add(player)
+        self.version += 1
+        self.persist_record("players", player)
+        self.scheduler.cursor = cursor
+        self.persist_schedule()
+
+    def close_current_lot(self):
+        """Closes the lot and returns a ClientMessage for each held bid that didn't count."""
+        # Bids that were sent before the deadline but arrived during the
+        # grace window count as if they had arrived in order
+        rejected = []
+        for message in self.current_lot.take_late_bids():
+            try:
+                self._accept_bid(message)
+            except AuctionValidationError as e:
+                print(f"Late bid rejected: {e.client_message.data}")
+                rejected.append(
+                    ClientMessage(
+                        ClientMessageType.CHANNEL_MESSAGE,
+                        f"Late bid '{message.content}' didn't count: {e.client_message.data}",
+                    )
+                )
+        self.current_lot.close()
+        self.machine.nom_from_bid()
+        return rejected
 
     def run_current_lot(self):
         for time_remaining in self.current_lot.run_lot():
@@ -529,6 +840,7 @@ class Auction:
             "amount": None,
             "player": None,
             "captain": None,
+            "player_query": None,
         }
         message_parts = message.content.split()
         if message_parts[0] == "!bid":
@@ -551,22 +863,28 @@ class Auction:
         if message_parts[0] == "!nominate":
             message_body["command"] = "!nominate"
 
+            # The player name is always a prefix of the message and the
+            # captain name a suffix, so walk the player trie forwards and the
+            # captain trie backwards once each and pair up the splits.
             name_parts = message_parts[1:]
-            for i in range(len(name_parts) + 1):
-                player_name, captain_name = name_parts[:i], name_parts[i:]
-                player_name = " ".join(player_name)
-                captain_name = " ".join(captain_name)
-
-                player = self.search_player(player_name)
-                captain = self.search_captain(captain_name)
-                if not player:
-                    if captain:
-                        message_body["captain"] == captain["name"]
-                    continue
+            captains = dict(self.captain_index.match_suffixes(name_parts))
+            for i, player in self.player_index.match_prefixes(name_parts):
                 message_body["player"] = player["name"]
+                captain = captains.get(i)
                 if captain:
                     message_body["captain"] = captain["name"]
                     return message_body
+            if message_body["player"]:
+                return message_body
+
+            # No exact player name, keep whatever isn't a trailing captain name
+            # around for fuzzy matching.
+            message_body["player_query"] = " ".join(name_parts)
+            splits = [i for i in captains if i > 0]
+            if splits:
+                i = min(splits)
+                message_body["captain"] = captains[i]["name"]
+                message_body["player_query"] = " ".join(name_parts[:i])
             return message_body
 
     def player(self, message):
@@ -656,11 +974,13 @@ class Auction:
 def make_auction_for_shell():
     from dotenv import load_dotenv
     load_dotenv()
-    from replit import db
-    auction = Auction(db=db)
+    # None falls back to the replit db, same as the bot
+    journal = open_journal_from_env()
+    auction = Auction(db=None if journal else open_store_from_env(), journal=journal)
     return auction
 
 if __name__ == "__main__":
     auction = make_auction_for_shell()
 
     auction.bootstrap_lists()
+    auction.flush()
@@ -3,27 +3,92 @@ from replit import db
 from draft import Auction
 from lot import INITIAL_BID_TIMER_DEFAULT
 
-def playerlist(players, is_picked=False):
-    players = [p for p in players if not p["is_picked"]]
-    players = sorted(players, key=lambda x: x["mmr"], reverse=True)
-
-    player_names = [p["name"] for p in players]
-    player_mmr = [str(p["mmr"]) for p in players]
-    player_names_string = "\n".join(player_names)
-    player_mmr_string = "\n".join(player_mmr)
+def _cached(auction, name, key, build):
+    """build() once per version of the auction's state (Auction.version).
+
+    Renders are kept in auction.render_cache, so separate drafts never see
+    each other's embeds. Without an auction nothing is cached.
+    """
+    if auction is None:
+        return build()
+    hit = auction.render_cache.get((name, key))
+    if hit is not None and hit[0] == auction.version:
+        return hit[1]
+    rendered = build()
+    auction.render_cache[(name, key)] = (auction.version, rendered)
+    return rendered
+
+
+# Discord rejects an embed with a field value longer than this
+FIELD_LIMIT = 1024
+PAGE_MAX_PLAYERS = 40
+
+
+def playerlist(players=None, is_picked=False, auction=None):
+    """The first page of the player list; see playerlist_pages."""
+    return playerlist_pages(players, auction=auction)[0]
+
+
+def playerlist_pages(players=None, auction=None):
+    """The remaining players, highest MMR first, split into pages.
+
+    With an auction the pages come straight from its PlayerPool, which is
+    already filtered and sorted, and are cached until the next pick or undo.
+    Otherwise `players` is filtered and sorted on every call.
+    """
+    if auction is None:
+        remaining = [p for p in players if not p["is_picked"]]
+        return _playerlist_pages(sorted(remaining, key=lambda x: x["mmr"], reverse=True))
+    return _cached(auction, "playerlist_pages", None, lambda: _playerlist_pages(auction.player_pool.players))
+
+
+def page_boundaries(rows, limit=FIELD_LIMIT, max_rows=PAGE_MAX_PLAYERS):
+    """Splits rows of (column, ...) strings into pages whose joined columns
+    each fit in one embed field. Returns [(start, end), ...]."""
+    boundaries = []
+    start = 0
+    lengths = None
+    for i, row in enumerate(rows):
+        # +1 for the newline joining this row to the previous one
+        row_lengths = [len(value) + 1 for value in row]
+        if lengths is not None and (
+            i - start >= max_rows
+            or any(total + n > limit + 1 for total, n in zip(lengths, row_lengths))
+        ):
+            boundaries.append((start, i))
+            start = i
+            lengths = None
+        if lengths is None:
+            lengths = row_lengths
+        else:
+            lengths = [total + n for total, n in zip(lengths, row_lengths)]
+    boundaries.append((start, len(rows)))
+    return boundaries
+
+
+def _playerlist_pages(players):
+    rows = [(p["name"][:FIELD_LIMIT - 1], str(p["mmr"])) for p in players]
+    boundaries = page_boundaries(rows)
+    pages = []
+    for page, (start, end) in enumerate(boundaries, 1):
+        embed = discord.Embed(
+            title="Player-list: ",
+            color=0x7289da,
+            description="All remaining players in the draft pool.",
+        )
+        embed.add_field(name="Player:", value="\n".join(name for name, _ in rows[start:end]) or "-")
+        embed.add_field(name="MMR:", value="\n".join(mmr for _, mmr in rows[start:end]) or "-")
+        if len(boundaries) > 1:
+            embed.set_footer(text=f"Page {page}/{len(boundaries)}")
+        pages.append(embed)
+    return pages
 
-    embed = discord.Embed(
-        title="Player-list: ",
-        color=0x7289da,
-        description="All remaining players in the draft pool.",
-    )
 
-    embed.add_field(name="Player:", value=player_names_string)
-    embed.add_field(name="MMR:", value=player_mmr_string)
-    return embed
+def captainlist(captains, auction=None):
+    return _cached(auction, "captainlist", None, lambda: _captainlist(captains))
 
 
-def captainlist(captains):
+def _captainlist(captains):
     captains = sorted(captains, key=lambda x: x["dollars"], reverse=True)
 
     captain_names = [c["name"] for c in captains]
@@ -117,7 +182,12 @@ def display_successful_nomination(player, captain, timer):
     return embed
 
 
-def display_team(captain, bank, players):
+def display_team(captain, bank, roster, auction=None):
+    return _cached(auction, "team", captain, lambda: _display_team(captain, bank, roster))
+
+
+def _display_team(captain, bank, roster):
+    players = roster.nominations
     names = '\n'.join([player.player_name for player in players])
     amounts = '\n'.join([str(player.amount_paid) for player in players])
     mmr = '\n'.join([str(player.player_mmr) for player in players])
@@ -125,7 +195,7 @@ def display_team(captain, bank, players):
     embed = discord.Embed(
         title=f'{captain}: ${bank}',
         color=0x2ecc71,
-        description=f'',
+        description=f'{len(roster)} players, ${roster.spent} spent, {roster.total_mmr} total MMR',
     )
 
     embed.add_field(name='Name', value=names, inline = True)
@@ -139,4 +209,30 @@ def display_break(timer):
         color=0xe91e63,
         description=f'The draft will resume in {timer} seconds.',
     )
-    return embed
\ No newline at end of file
+    return embed
+
+def auction_board(status, player, nominator, high_bid, time_left, captains):
+    """The pinned board, kept up to date by editing one message."""
+    embed = discord.Embed(
+        title="Auction Board",
+        color=0x3498db,
+        description=status,
+    )
+    if player is not None:
+        embed.add_field(name="Player:", value=f"{player['name']} ({player.get('mmr', '')} MMR)", inline=True)
+        embed.add_field(name="Nominated by:", value=nominator, inline=True)
+        if high_bid is None:
+            embed.add_field(name="High bid:", value="No bids yet", inline=False)
+        else:
+            embed.add_field(
+                name="High bid:",
+                value=f"${high_bid['amount']} by {high_bid['captain_name']}",
+                inline=False,
+            )
+    if time_left is not None:
+        embed.add_field(name="Time left:", value=time_left, inline=False)
+
+    captains = sorted(captains, key=lambda x: x["dollars"], reverse=True)
+    embed.add_field(name="Captain:", value="\n".join(c["name"] for c in captains) or "-", inline=True)
+    embed.add_field(name="Bank:", value="\n".join(str(c["dollars"]) for c in captains) or "-", inline=True)
+    return embed
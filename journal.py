@@ -0,0 +1,94 @@
+import json
+import os
+
+SNAPSHOT_EVERY = 200  # events
+
+
+class FileJournal:
+    """Append-only event journal with periodic snapshots, kept in a directory.
+
+    Events are JSON lines of {"seq", "kind", "data"} in journal.jsonl. A
+    snapshot holds the full draft state as of some seq; once it is safely on
+    disk the journal is truncated, so recovery is one snapshot load plus a
+    short replay. Events at or below the snapshot's seq are ignored on load,
+    which covers a crash between writing a snapshot and truncating.
+    """
+
+    def __init__(self, directory, snapshot_every=SNAPSHOT_EVERY, fsync=False):
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self._file = open(self.journal_path, "a")
+
+    def load(self):
+        """Returns (snapshot state or None, [events after the snapshot])."""
+        state = None
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            state = snapshot["state"]
+            snapshot_seq = snapshot["seq"]
+
+        events = []
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # A torn write from a crash can only be the last line
+                    break
+                if event["seq"] > snapshot_seq:
+                    events.append(event)
+
+        self.seq = events[-1]["seq"] if events else snapshot_seq
+        self.events_since_snapshot = len(events)
+        return state, events
+
+    def append(self, kind, data):
+        self.seq += 1
+        event = dict(seq=self.seq, kind=kind, data=data)
+        self._file.write(json.dumps(event) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.events_since_snapshot += 1
+        return event
+
+    def should_snapshot(self):
+        return self.events_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, state):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(seq=self.seq, state=state), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        self._file.close()
+        self._file = open(self.journal_path, "w")
+        self.events_since_snapshot = 0
+
+    def reset(self):
+        self._file.close()
+        if os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
+        self._file = open(self.journal_path, "w")
+        self.seq = 0
+        self.events_since_snapshot = 0
+
+    def close(self):
+        self._file.close()
+
+
+def open_journal_from_env():
+    journal_dir = os.getenv("AUCTION_JOURNAL_DIR")
+    if not journal_dir:
+        return None
+    return FileJournal(journal_dir)
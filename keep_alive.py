@@ -1,18 +1,97 @@
-from flask import Flask
-from threading import Thread
+import hashlib
+import json
+import math
 
-app = Flask("")
+from aiohttp import web
 
+import metrics
 
-@app.route("/")
-def home():
-    return "Hello. I am alive!"
+PORT = 8080
+# /healthz fails once the event loop falls this far behind
+MAX_HEALTHY_LAG = 1.0  # seconds
 
 
-def run():
-    app.run(host="0.0.0.0", port=8080)
+class StatusServer:
+    """HTTP server on the bot's own event loop for uptime pings and dashboards.
 
+    Handlers run between the bot's other work, so they always see the draft
+    in a consistent state and have to stay cheap: /state is encoded once per
+    Auction.state_key() and answered with a 304 when the client's ETag is
+    current.
+    """
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+    def __init__(self, client, auction, stall_monitor, host="0.0.0.0", port=PORT):
+        self.client = client
+        self.auction = auction
+        self.stall_monitor = stall_monitor
+        self.host = host
+        self.port = port
+        self.runner = None
+
+        self.state_key = None
+        self.state_body = None
+        self.state_etag = None
+        self.state_renders = 0
+        self.not_modified = 0
+
+        self.app = web.Application()
+        self.app.router.add_get("/", self.home)
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/state", self.state)
+        self.app.router.add_get("/metrics", self.metrics)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def home(self, request):
+        return web.Response(text="Hello. I am alive!")
+
+    async def healthz(self, request):
+        ws = self.client.ws
+        connected = ws is not None and ws.open and self.client.is_ready()
+        lag = self.stall_monitor.last_stall
+        latency = self.client.latency
+        healthy = connected and lag < MAX_HEALTHY_LAG
+        body = dict(
+            status="ok" if healthy else "unhealthy",
+            gateway_connected=connected,
+            gateway_latency_ms=None if math.isnan(latency) else round(latency * 1000, 1),
+            loop_lag_ms=round(lag * 1000, 1),
+            max_loop_stall_ms=round(self.stall_monitor.max_stall * 1000, 1),
+        )
+        return web.json_response(body, status=200 if healthy else 503)
+
+    async def state(self, request):
+        key = self.auction.state_key()
+        if key != self.state_key:
+            self.state_body = json.dumps(self.auction.state_snapshot()).encode()
+            self.state_etag = '"' + hashlib.sha1(self.state_body).hexdigest() + '"'
+            self.state_key = key
+            self.state_renders += 1
+        headers = {"ETag": self.state_etag, "Cache-Control": "no-cache"}
+        if self.state_etag in request.headers.get("If-None-Match", ""):
+            self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=self.state_body, content_type="application/json", headers=headers)
+
+    async def metrics(self, request):
+        return web.Response(
+            text=metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE}
+        )
+
+    def stats(self):
+        return dict(state_renders=self.state_renders, not_modified=self.not_modified)
+
+
+async def keep_alive(client, auction, stall_monitor, host="0.0.0.0", port=PORT):
+    """Starts a StatusServer on the running loop and returns it."""
+    server = StatusServer(client, auction, stall_monitor, host=host, port=port)
+    await server.start()
+    return server
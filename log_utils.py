@@ -1,9 +1,21 @@
+import atexit
 import datetime
+import gzip
+import json
 import logging
 import logging.config
-import json
-from collections import OrderedDict
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+
 
+EVENT_LOG = "events.log"
+EVENT_LOG_MAX_BYTES = 10 * 1024 * 1024
+EVENT_LOG_ROTATE_EVERY = 24 * 60 * 60  # seconds
+EVENT_LOG_BACKUPS = 14
 
 LOGGING_CONFIG = {
     "version": 1,
@@ -18,12 +30,6 @@ LOGGING_CONFIG = {
             "class": "logging.StreamHandler",
             "stream": "ext://sys.stdout",  # Default is stderr
         },
-        "eventlog": {
-            "level": "INFO",
-            "formatter": "standard",
-            "class": "logging.FileHandler",
-            "filename": "events.log",
-        },
     },
     "loggers": {
         "": {  # root logger
@@ -31,13 +37,12 @@ LOGGING_CONFIG = {
             "level": "WARNING",
             "propagate": False,
         },
+        # "events" and "transitions" get their handlers from start_event_log
         "events": {
-            "handlers": ["default", "eventlog"],
             "level": "INFO",
             "propagate": False,
         },
         "transitions": {
-            "handlers": ["default", "eventlog"],
             "level": "INFO",
             "propagate": False,
         },
@@ -49,25 +54,176 @@ LOGGING_CONFIG = {
     },
 }
 
+
+class JsonEventFormatter(logging.Formatter):
+    """Encodes dict messages as one JSON line, timestamp first.
+
+    Anything else (transitions' messages, tracebacks) is formatted as usual.
+    """
+
+    def format(self, record):
+        if isinstance(record.msg, dict):
+            payload = {"timestamp": datetime.datetime.fromtimestamp(record.created).isoformat()}
+            payload.update(record.msg)
+            return json.dumps(payload, default=str)
+        return super().format(record)
+
+
+def _gzip_name(name):
+    return name + ".gz"
+
+
+def _gzip_rotate(source, dest):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class EventFileHandler(logging.handlers.RotatingFileHandler):
+    """Buffered event log that rolls over by size or age, gzipping old files.
+
+    Records are written without a flush each; the listener flushes whenever
+    its queue runs dry, so a burst of events costs one write to disk.
+    """
+
+    def __init__(self, filename, max_bytes=EVENT_LOG_MAX_BYTES, rotate_every=EVENT_LOG_ROTATE_EVERY,
+                 backups=EVENT_LOG_BACKUPS, clock=time.time):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, delay=True)
+        self.rotate_every = rotate_every
+        self.clock = clock
+        self.namer = _gzip_name
+        self.rotator = _gzip_rotate
+        try:
+            self.size = os.path.getsize(self.baseFilename)
+        except OSError:
+            self.size = 0
+        self.rollover_at = clock() + rotate_every
+
+    def shouldRollover(self, record):
+        # Counts bytes itself: the base class seeks, which flushes every record
+        too_big = self.maxBytes > 0 and self.size >= self.maxBytes
+        return too_big or (self.size > 0 and self.clock() >= self.rollover_at)
+
+    def doRollover(self):
+        super().doRollover()
+        self.size = 0
+        self.rollover_at = self.clock() + self.rotate_every
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            line = self.format(record) + self.terminator
+            self.stream.write(line)
+            self.size += len(line)
+        except Exception:
+            self.handleError(record)
+
+
+class EventQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread as they are.
+
+    The stock QueueHandler formats the message before enqueueing, which would
+    put the encoding back on the event loop.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class EventLogListener(logging.handlers.QueueListener):
+    """Writes queued records from a background thread, flushing when idle.
+
+    Besides LogRecords the queue takes (created, payload) pairs from
+    log_command and friends; building the LogRecord is most of the cost of
+    logging, so it is done here rather than on the event loop.
+    """
+
+    def prepare(self, record):
+        if isinstance(record, tuple):
+            created, payload = record
+            record = logging.makeLogRecord(dict(
+                name="events", levelno=logging.INFO, levelname="INFO", msg=payload, created=created,
+            ))
+        return record
+
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+        return self.queue.get(block)
+
+
+event_listener = None
+event_queue = None
+
+
+def start_event_log(filename=EVENT_LOG):
+    global event_listener, event_queue
+    if event_listener is not None:
+        return event_listener
+    formatter = JsonEventFormatter("%(message)s")
+    stdout = logging.StreamHandler(sys.stdout)
+    stdout.setFormatter(formatter)
+    eventlog = EventFileHandler(filename)
+    eventlog.setFormatter(formatter)
+
+    event_queue = queue.SimpleQueue()
+    queue_handler = EventQueueHandler(event_queue)
+    for name in ("events", "transitions"):
+        logging.getLogger(name).handlers = [queue_handler]
+
+    event_listener = EventLogListener(event_queue, stdout, eventlog)
+    event_listener.start()
+    return event_listener
+
+
+def stop_event_log():
+    """Writes out everything still queued and closes the log files."""
+    global event_listener, event_queue
+    if event_listener is None:
+        return
+    listener, event_listener = event_listener, None
+    event_queue = None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
 # Run once at startup:
 logging.config.dictConfig(LOGGING_CONFIG)
+start_event_log()
+atexit.register(stop_event_log)
 command_log = logging.getLogger("events")
 
+
+def _log_payload(payload):
+    # Payloads are encoded later on the listener thread, so they must not be
+    # mutated after this
+    if event_queue is not None and command_log.isEnabledFor(logging.INFO):
+        event_queue.put((time.time(), payload))
+
+
 def log_command(ctx, message_body=None, **other_info):
-    logging_payload = OrderedDict(
-        timestamp=datetime.datetime.now().isoformat(),
+    logging_payload = dict(
         author=ctx.message.author.name,
         message=str(ctx.message.content),
     )
 
     logging_payload.update(other_info)
-    command_log.info(json.dumps(logging_payload))
+    _log_payload(logging_payload)
 
 def log_state_transition(start_state, end_state, **message_info):
-    logging_payload = OrderedDict(
-        timestamp=datetime.datetime.now().isoformat(),
+    logging_payload = dict(
         start_state=start_state,
         end_state=end_state,
     )
     logging_payload.update(message_info)
-    command_log.info(json.dumps(logging_payload))
+    _log_payload(logging_payload)
+
+def log_event(event, **info):
+    logging_payload = dict(event=event)
+    logging_payload.update(info)
+    _log_payload(logging_payload)
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+import metrics
+
+STALL_CHECK_INTERVAL = 0.1  # seconds
+
+
+class LoopStallMonitor:
+    """Measures how late the event loop gets around to a periodic wakeup.
+
+    Any lateness beyond the check interval is time the loop spent blocked on
+    something else, e.g. a synchronous db call. Call reset() at the start of
+    whatever window you care about (like a lot) and read max_stall after.
+    """
+
+    def __init__(self, interval=STALL_CHECK_INTERVAL):
+        self.interval = interval
+        self.max_stall = 0
+        self.last_stall = 0
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self):
+        self.max_stall = 0
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_stall = max(0, time.perf_counter() - expected)
+            self.max_stall = max(self.max_stall, self.last_stall)
+            metrics.LOOP_LAG.observe(self.last_stall)
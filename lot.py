@@ -1,5 +1,7 @@
 import asyncio
+import math
 import random
+import time
 
 
 async def timer(t):
@@ -14,17 +16,39 @@ async def timer(t):
 INITIAL_BID_TIMER_DEFAULT = 45
 LOT_TIMING_STRUCTURE = [45, 30, 30, 30, 30, 20, 20, 20, 15]
 TWO_CAPTAINS_MODE_TIMER = 15
+ANNOUNCE_EVERY = 5  # seconds
+# How long a lot waits after its deadline for bids that were sent in time
+# but have not reached us yet
+LATE_BID_GRACE = 1.5  # seconds
 
 
 class Lot:
-    def __init__(self, player, nominator, current_bids=None):
-        if current_bids is None:
-            self.current_bids = []
+    def __init__(
+        self, player, nominator, current_bids=None, clock=time.monotonic, wall_clock=time.time
+    ):
+        self.clock = clock
+        self.wall_clock = wall_clock
+        # Absolute close time on `clock`, set once bidding starts. While the
+        # lot is paused it is None and paused_remaining holds the time left.
+        self.deadline = None
+        self.paused_remaining = None
+        self.close_drift = None
+        # Once the deadline passes the lot is closing: the clock no longer
+        # moves and bids sent before the deadline are held in late_bids as
+        # (sent_at, bid) until the grace window is over.
+        self.closing = False
+        self.late_bids = []
+        self.current_bids = []
+        # Highest bid so far, and every bid tied with it (for all-in ties)
+        self.max_bid = None
+        self.tied_bids = []
         self.player = player
         self.nominator = nominator
         self.time_remaining = None
         self.winning_bid = None
         self.is_paused = False
+        for bid in current_bids or []:
+            self.add_bid(bid)
 
     def to_dict(self):
         return dict(
@@ -33,8 +57,9 @@ class Lot:
             nominator=self.nominator,
         )
 
-    def from_dict(self, d):
-        return Lot(**d)
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
 
     def determine_winner(self):
         if not self.current_bids:
@@ -45,15 +70,9 @@ class Lot:
             )
         
 
-        highest_bid_amount = sorted(self.current_bids, key=lambda x: x["amount"], reverse=True)[0]["amount"]
-        same_bids = []
-        for bid in self.current_bids:
-            if bid["amount"] == highest_bid_amount:
-                same_bids.append(bid)
-        
         #Our PM has confirmed there can be multiple 'tied' bids if captains go 'all in' for players, 
         #and that it should be handled by random selection.
-        winning_bid = random.choice(same_bids)
+        winning_bid = random.choice(self.tied_bids)
 
         return dict(
             captain=winning_bid["captain_name"],
@@ -63,12 +82,23 @@ class Lot:
 
     def add_bid(self, bid):
         self.current_bids.append(bid)
+        if self.max_bid is None or bid["amount"] > self.max_bid["amount"]:
+            self.max_bid = bid
+            self.tied_bids = [bid]
+        elif bid["amount"] == self.max_bid["amount"]:
+            # The latest of the tied bids counts as the current max
+            self.max_bid = bid
+            self.tied_bids.append(bid)
         time_remaining_idx = len(self.current_bids) - 1
         self.time_remaining = LOT_TIMING_STRUCTURE[
             min(time_remaining_idx, len(LOT_TIMING_STRUCTURE) - 1)
         ]
         if self._detect_two_captains_mode():
             self.time_remaining = TWO_CAPTAINS_MODE_TIMER
+        if self.is_paused:
+            self.paused_remaining = self.time_remaining
+        elif self.deadline is not None and not self.closing:
+            self.deadline = self.clock() + self.time_remaining
         return self.time_remaining
 
     def _detect_two_captains_mode(self):
@@ -82,10 +112,77 @@ class Lot:
 
     @property
     def current_max_bid(self):
-        if not self.current_bids:
+        return self.max_bid
+
+    def start_clock(self, initial_timer=INITIAL_BID_TIMER_DEFAULT):
+        self.time_remaining = initial_timer
+        self.deadline = self.clock() + initial_timer
+
+    def seconds_left(self):
+        if self.is_paused:
+            return self.paused_remaining
+        if self.deadline is None:
             return None
-        else:
-            return sorted(self.current_bids, key=lambda x: x["amount"])[-1]
+        return max(0, self.deadline - self.clock())
+
+    def pause(self):
+        if self.is_paused or self.closing:
+            return
+        self.paused_remaining = self.seconds_left()
+        self.deadline = None
+        self.is_paused = True
+
+    def resume(self):
+        if not self.is_paused:
+            return
+        self.is_paused = False
+        if self.paused_remaining is not None:
+            self.deadline = self.clock() + self.paused_remaining
+        self.paused_remaining = None
+
+    def next_announcement(self):
+        """The next "N seconds left" mark strictly below the time left, or 0."""
+        left = self.seconds_left()
+        if not left:
+            return 0
+        return (math.ceil(left) - 1) // ANNOUNCE_EVERY * ANNOUNCE_EVERY
+
+    def is_closed(self):
+        return not self.is_paused and self.deadline is not None and self.clock() >= self.deadline
+
+    def begin_close(self):
+        """Starts the grace window if the deadline has passed. Returns whether it did."""
+        if not self.closing and not self.is_closed():
+            return False
+        self.closing = True
+        return True
+
+    def sent_in_time(self, sent_at):
+        """Whether a bid sent at `sent_at` (wall clock seconds) beat the deadline."""
+        if self.deadline is None:
+            return False
+        age = self.wall_clock() - sent_at
+        return self.clock() - age < self.deadline
+
+    def hold_late_bid(self, sent_at, bid):
+        self.late_bids.append((sent_at, bid))
+
+    def take_late_bids(self):
+        """The held late bids in the order they were sent."""
+        late_bids = sorted(self.late_bids, key=lambda late_bid: late_bid[0])
+        self.late_bids = []
+        return [bid for _, bid in late_bids]
+
+    def grace_left(self):
+        return max(0, self.deadline + LATE_BID_GRACE - self.clock())
+
+    def close(self):
+        # How late the lot actually closed compared to when it should have,
+        # counting the grace window if there was one
+        if self.deadline is not None:
+            planned = self.deadline + (LATE_BID_GRACE if self.closing else 0)
+            self.close_drift = self.clock() - planned
+        self.winning_bid = self.determine_winner()
 
     def run_lot(self, initial_timer=INITIAL_BID_TIMER_DEFAULT):
         self.time_remaining = initial_timer
@@ -0,0 +1,60 @@
+class MemberIndex:
+    """Guild members by name, kept current from the gateway's member events.
+
+    The same user shows up once per guild the bot shares with them; any of
+    those members mentions the same user, so lookups return whichever was
+    indexed first. On a miss the caller's scan is tried and its result
+    indexed, so a missed event costs one scan rather than a wrong answer.
+    """
+
+    def __init__(self):
+        self.by_name = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(member):
+        return (member.guild.id, member.id)
+
+    def add(self, member):
+        self.by_name.setdefault(member.name, {})[self._key(member)] = member
+
+    def remove(self, member, name=None):
+        name = member.name if name is None else name
+        entries = self.by_name.get(name)
+        if entries is None:
+            return
+        entries.pop(self._key(member), None)
+        if not entries:
+            del self.by_name[name]
+
+    def rename(self, user_id, old_name, new_name):
+        entries = self.by_name.get(old_name, {})
+        for key in [key for key in entries if key[1] == user_id]:
+            self.by_name.setdefault(new_name, {})[key] = entries.pop(key)
+        if old_name in self.by_name and not entries:
+            del self.by_name[old_name]
+
+    def rebuild(self, members):
+        self.by_name = {}
+        for member in members:
+            self.add(member)
+
+    def get(self, name, scan=None):
+        entries = self.by_name.get(name)
+        if entries:
+            self.hits += 1
+            return next(iter(entries.values()))
+        self.misses += 1
+        if scan is None:
+            return None
+        member = scan(name)
+        if member is not None:
+            self.add(member)
+        return member
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.by_name.values())
+
+    def stats(self):
+        return dict(names=len(self.by_name), members=len(self), hits=self.hits, misses=self.misses)
@@ -0,0 +1,157 @@
+import bisect
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; +Inf is implied
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for the instruments below; they register themselves on creation.
+
+    Recording and render() both happen on the bot's event loop (render() is
+    called by the status server in keep_alive), so nothing needs a lock:
+    recording is a dict lookup and a couple of increments.
+    """
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        registry.append(self)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Gauge(Metric):
+    """A value that is set, or read from a function at scrape time.
+
+    The function returns a number, or a dict of label values to numbers.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self.values = {}
+        self.function = None
+
+    def set(self, value, *label_values):
+        self.values[label_values] = value
+
+    def set_function(self, function):
+        self.function = function
+
+    def render(self):
+        lines = self.header()
+        values = self.values.copy()
+        if self.function is not None:
+            try:
+                read = self.function()
+            except Exception as e:
+                print(f"Failed to read {self.name}: {e!r}")
+                read = {}
+            values.update(read if isinstance(read, dict) else {(): read})
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (not cumulative), sum]
+        self.series = {}
+
+    def observe(self, value, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *label_values):
+        series = self.series.get(label_values)
+        return sum(series[0]) if series is not None else 0
+
+    def render(self):
+        lines = self.header()
+        for label_values, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, le)} {cumulative}")
+            labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render():
+    """All metrics in the Prometheus text format."""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+COMMANDS = Counter("auction_commands_total", "Commands handled", labels=("command", "outcome"))
+COMMAND_LATENCY = Histogram(
+    "auction_command_seconds", "Time from invoking a command to it returning", labels=("command",)
+)
+BID_ACK_LATENCY = Histogram(
+    "auction_bid_ack_seconds", "Time from receiving a bid to acknowledging it", labels=("outcome",)
+)
+LOOP_LAG = Histogram(
+    "auction_loop_lag_seconds", "How late the event loop ran a periodic wakeup", buckets=LAG_BUCKETS
+)
+LOT_CLOSE_DRIFT = Histogram(
+    "auction_lot_close_drift_seconds", "How late lots closed after their deadline", buckets=LAG_BUCKETS
+)
+OUTBOUND_DEPTH = Gauge("auction_outbound_queue_depth", "Messages waiting to be sent", labels=("channel",))
+OUTBOUND_LATENCY = Histogram("auction_outbound_send_seconds", "Time from queueing a message to it being sent")
+STORAGE_LATENCY = Histogram("auction_storage_seconds", "Latency of db calls", labels=("store", "op"))
@@ -0,0 +1,207 @@
+import functools
+import time
+
+import slugify
+
+# Trie nodes are dicts keyed by slug word; slug words are never empty, so the
+# empty string is free to hold the record of a name that ends at that node.
+_RECORD = ""
+
+
+# Slugifying is the bulk of a trie walk, and the same tokens (names,
+# mostly) come up message after message, as well as in both walks of one.
+@functools.lru_cache(maxsize=4096)
+def slug_words(text):
+    return tuple(word for word in slugify.slugify(text).split("-") if word)
+
+
+class NameIndex:
+    """Maps the exact, lower-cased and slugified forms of a name to its record.
+
+    The first record added for a key wins, which mirrors the old behaviour of
+    scanning the list in order and returning the first match.
+
+    Names are also stored in a trie over their slug words so that a message
+    can be matched against every known name in a single left-to-right pass,
+    and in a second trie over the same words reversed for names that end one.
+    """
+
+    def __init__(self):
+        self.by_key = {}
+        self.trie = {}
+        self.reversed_trie = {}
+
+    @staticmethod
+    def keys_for(name):
+        return [name, name.lower(), slugify.slugify(name)]
+
+    def add(self, name, record):
+        for key in self.keys_for(name):
+            if key:
+                self.by_key.setdefault(key, record)
+
+        words = slug_words(name)
+        if not words:
+            return
+        node = self.trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(_RECORD, record)
+        node = self.reversed_trie
+        for word in reversed(words):
+            node = node.setdefault(word, {})
+        node.setdefault(_RECORD, record)
+
+    def get(self, name):
+        if not name:
+            return None
+        for key in self.keys_for(name):
+            record = self.by_key.get(key)
+            if record is not None:
+                return record
+        return None
+
+    def match_prefixes(self, tokens):
+        """Yields (split, record) for every split where tokens[:split] is a name.
+
+        Splits come out in increasing order and only fall on token boundaries,
+        the same places the old split-point loop tried.
+        """
+        node = self.trie
+        for i, token in enumerate(tokens):
+            for word in slug_words(token):
+                node = node.get(word)
+                if node is None:
+                    return
+            if _RECORD in node:
+                yield i + 1, node[_RECORD]
+
+    def match_suffixes(self, tokens):
+        """Yields (split, record) for every split where tokens[split:] is a name.
+
+        The mirror image of match_prefixes: splits come out in decreasing order.
+        """
+        node = self.reversed_trie
+        for i in range(len(tokens) - 1, -1, -1):
+            for word in reversed(slug_words(tokens[i])):
+                node = node.get(word)
+                if node is None:
+                    return
+            if _RECORD in node:
+                yield i, node[_RECORD]
+
+    def clear(self):
+        self.by_key = {}
+        self.trie = {}
+        self.reversed_trie = {}
+
+    def rebuild(self, records):
+        self.clear()
+        for record in records:
+            self.add(record["name"], record)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.by_key)
+
+
+FUZZY_TIME_BUDGET = 0.005  # seconds
+FUZZY_CANDIDATES = 20
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_AUTO_RESOLVE_SIMILARITY = 0.75
+# Matching only the start of a longer name is worth a suggestion but should
+# never be enough to auto-resolve on its own.
+FUZZY_PREFIX_WEIGHT = 0.7
+
+
+def trigrams(slug):
+    padded = f"  {slug} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """Trigram inverted index for typo-tolerant name lookups.
+
+    Trigram overlap picks a handful of candidates, which are then ranked by
+    edit distance on their slugs. Several names (e.g. a player's nicknames)
+    can point at the same record; a record is only ever suggested once.
+    """
+
+    def __init__(self, time_budget=FUZZY_TIME_BUDGET):
+        self.time_budget = time_budget
+        self.entries = []
+        self.postings = {}
+
+    def add(self, name, record):
+        slug = slugify.slugify(name)
+        if not slug:
+            return
+        entry_id = len(self.entries)
+        self.entries.append((slug, record))
+        for trigram in trigrams(slug):
+            self.postings.setdefault(trigram, []).append(entry_id)
+
+    def clear(self):
+        self.entries = []
+        self.postings = {}
+
+    def suggest(self, query, limit=3):
+        """Returns up to `limit` (similarity, record) pairs, best first."""
+        slug = slugify.slugify(query)
+        if not slug:
+            return []
+
+        deadline = time.perf_counter() + self.time_budget
+        overlap = {}
+        for trigram in trigrams(slug):
+            for entry_id in self.postings.get(trigram, ()):
+                overlap[entry_id] = overlap.get(entry_id, 0) + 1
+            if time.perf_counter() > deadline:
+                break
+        candidates = sorted(overlap, key=overlap.get, reverse=True)[:FUZZY_CANDIDATES]
+
+        best_by_record = {}
+        for entry_id in candidates:
+            entry_slug, record = self.entries[entry_id]
+            similarity = 1 - edit_distance(slug, entry_slug) / max(len(slug), len(entry_slug))
+            if len(slug) >= 3 and len(entry_slug) > len(slug):
+                prefix = entry_slug[:len(slug)]
+                prefix_similarity = 1 - edit_distance(slug, prefix) / len(slug)
+                similarity = max(similarity, FUZZY_PREFIX_WEIGHT * prefix_similarity)
+            if similarity < FUZZY_MIN_SIMILARITY:
+                continue
+            key = id(record)
+            if key not in best_by_record or best_by_record[key][0] < similarity:
+                best_by_record[key] = (similarity, record)
+            if time.perf_counter() > deadline:
+                break
+
+        ranked = sorted(best_by_record.values(), key=lambda x: x[0], reverse=True)
+        return ranked[:limit]
+
+    def resolve(self, query):
+        """Returns the record if exactly one name is a close match, else None."""
+        suggestions = self.suggest(query, limit=2)
+        if not suggestions or suggestions[0][0] < FUZZY_AUTO_RESOLVE_SIMILARITY:
+            return None
+        if len(suggestions) > 1 and suggestions[1][0] == suggestions[0][0]:
+            return None
+        return suggestions[0][1]
@@ -0,0 +1,161 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+import metrics
+
+# Priority classes, lowest goes first
+URGENT = 0  # bid acks, lot results
+NORMAL = 1  # announcements, embeds, command replies
+COUNTDOWN = 2  # "N seconds left" chatter, only the latest one matters
+
+# Discord lets a bot send 5 messages per 5 seconds to a channel
+CHANNEL_RATE = 1.0  # messages per second
+CHANNEL_BURST = 5
+
+
+class ChannelSender:
+    """Sends messages to one channel in priority order, paced by a token bucket.
+
+    A countdown that is still waiting when a newer one is queued is dropped
+    (its future resolves to None), so a backed-up channel never shows a run
+    of stale countdowns.
+    """
+
+    def __init__(self, channel, rate=CHANNEL_RATE, burst=CHANNEL_BURST, clock=time.monotonic):
+        self.channel = channel
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.refilled_at = clock()
+        self.queue = []
+        self.pending_countdown = None
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self._order = itertools.count()
+
+        self.sent = 0
+        self.merged = 0
+        self.max_depth = 0
+        self.last_latency = 0
+        self.max_latency = 0
+        self.total_latency = 0
+
+    def send(self, content=None, embed=None, priority=NORMAL):
+        future = asyncio.get_event_loop().create_future()
+        entry = (priority, next(self._order), self.clock(), content, embed, future)
+        if priority == COUNTDOWN:
+            if self.pending_countdown is not None and not self.pending_countdown.done():
+                self.pending_countdown.set_result(None)
+                self.merged += 1
+            self.pending_countdown = future
+        heapq.heappush(self.queue, entry)
+        self.max_depth = max(self.max_depth, self.depth())
+        self.wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+        return future
+
+    def depth(self):
+        return sum(1 for entry in self.queue if not entry[-1].done())
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    async def _run(self):
+        while True:
+            # Drop anything merged away or given up on by the caller
+            while self.queue and self.queue[0][-1].done():
+                heapq.heappop(self.queue)
+            if not self.queue:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                # Something more urgent may have come in while we waited
+                continue
+
+            _, _, queued_at, content, embed, future = heapq.heappop(self.queue)
+            if future.done():
+                continue
+            self.tokens -= 1
+            try:
+                message = await self.channel.send(content=content, embed=embed)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            latency = self.clock() - queued_at
+            self.sent += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self.total_latency += latency
+            metrics.OUTBOUND_LATENCY.observe(latency)
+            if not future.done():
+                future.set_result(message)
+
+    def reset_peaks(self):
+        self.max_depth = self.depth()
+        self.max_latency = 0
+
+    def stats(self):
+        return dict(
+            depth=self.depth(),
+            max_depth=self.max_depth,
+            sent=self.sent,
+            merged=self.merged,
+            last_latency=self.last_latency,
+            max_latency=self.max_latency,
+            mean_latency=self.total_latency / self.sent if self.sent else 0,
+        )
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+
+
+class OutboundScheduler:
+    """One ChannelSender per channel the bot talks to."""
+
+    def __init__(self, rate=CHANNEL_RATE, burst=CHANNEL_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.senders = {}
+
+    def sender_for(self, channel):
+        sender = self.senders.get(channel.id)
+        if sender is None:
+            sender = ChannelSender(channel, rate=self.rate, burst=self.burst)
+            self.senders[channel.id] = sender
+        return sender
+
+    def send(self, channel, content=None, embed=None, priority=NORMAL):
+        """Queues a message and returns a future for the sent Message.
+
+        The future can be ignored for fire-and-forget messages; failures are
+        printed instead of being lost.
+        """
+        future = self.sender_for(channel).send(content, embed=embed, priority=priority)
+        future.add_done_callback(self._report_failure)
+        return future
+
+    def _report_failure(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Failed to send message: {future.exception()!r}")
+
+    def depths(self):
+        return {(str(channel_id),): sender.depth() for channel_id, sender in list(self.senders.items())}
+
+    def stats(self):
+        return {channel_id: sender.stats() for channel_id, sender in self.senders.items()}
+
+    def close(self):
+        for sender in self.senders.values():
+            sender.close()
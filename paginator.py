@@ -0,0 +1,70 @@
+import collections
+
+import discord
+
+PAGE_PREV = "◀️"
+PAGE_NEXT = "▶️"
+# Older paged messages stop responding to reactions
+MAX_PAGED_MESSAGES = 20
+
+
+class PagedMessage:
+    """One message that flips through pages of embeds when reacted to.
+
+    get_pages is called on every flip so the pages follow the draft; it is
+    expected to be cached (e.g. embed.playerlist_pages with a version), so a
+    flip between picks costs one edit and no rendering.
+    """
+
+    def __init__(self, message, get_pages):
+        self.message = message
+        self.get_pages = get_pages
+        self.page = 0
+
+    async def flip(self, step):
+        pages = self.get_pages()
+        page = max(0, min(len(pages) - 1, self.page + step))
+        if page == self.page and self.page < len(pages):
+            return False
+        self.page = page
+        await self.message.edit(embed=pages[page])
+        return True
+
+
+class Paginator:
+    """Keeps track of the paged messages the bot has sent."""
+
+    def __init__(self, max_messages=MAX_PAGED_MESSAGES):
+        self.max_messages = max_messages
+        self.messages = collections.OrderedDict()
+
+    async def send(self, send, get_pages):
+        """Sends the first page with `send` and sets up navigation if needed."""
+        pages = get_pages()
+        message = await send(embed=pages[0])
+        if len(pages) > 1:
+            self.messages[message.id] = PagedMessage(message, get_pages)
+            if len(self.messages) > self.max_messages:
+                self.messages.popitem(last=False)
+            for emoji in (PAGE_PREV, PAGE_NEXT):
+                await message.add_reaction(emoji)
+        return message
+
+    async def on_reaction(self, message_id, emoji, user=None):
+        """Returns True if the reaction was a page flip on one of our messages."""
+        paged = self.messages.get(message_id)
+        if paged is None:
+            return False
+        if emoji == PAGE_PREV:
+            await paged.flip(-1)
+        elif emoji == PAGE_NEXT:
+            await paged.flip(1)
+        else:
+            return False
+        if user is not None:
+            # So the same arrow can be pressed again; needs Manage Messages
+            try:
+                await paged.message.remove_reaction(emoji, user)
+            except discord.HTTPException:
+                pass
+        return True
@@ -0,0 +1,53 @@
+import bisect
+
+
+class PlayerPool:
+    """The unpicked players, highest MMR first.
+
+    Kept sorted as players are picked and un-picked, so nothing has to
+    filter and re-sort the whole player list. Players with the same MMR stay
+    in the order they were added, the same as a stable sort would leave them.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.players = []
+        self.order = {}
+
+    def _key(self, player):
+        order = self.order.setdefault(id(player), len(self.order))
+        return (-player["mmr"], order)
+
+    def add(self, player):
+        key = self._key(player)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return
+        self.keys.insert(i, key)
+        self.players.insert(i, player)
+
+    def remove(self, player):
+        key = self._key(player)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.players[i]
+
+    def rebuild(self, players):
+        self.keys = []
+        self.players = []
+        self.order = {}
+        for player in players:
+            self._key(player)
+        remaining = [p for p in players if not p["is_picked"]]
+        for player in remaining:
+            self.keys.append(self._key(player))
+        pairs = sorted(zip(self.keys, remaining), key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.players = [player for _, player in pairs]
+
+    def top(self):
+        return self.players[0] if self.players else None
+
+    def __len__(self):
+        return len(self.players)
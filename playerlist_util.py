@@ -25,6 +25,7 @@ def parse_playerlist_csv(filename):
             player["pos3"] = row["Pos 3"]
             player["pos4"] = row["Pos 4"]
             player["pos5"] = row["Pos 5"]
+            player["nicknames"] = parse_nicknames(row.get("nickname"))
 
             players.append(player)
         return sorted(players, key=lambda x: x["draft_value"], reverse=True)
@@ -49,12 +50,19 @@ def parse_playerlist(filename):
             player["pos3"] = row["Pos 3:"]
             player["pos4"] = row["Pos 4: "]
             player["pos5"] = row["Pos 5:"]
+            player["nicknames"] = parse_nicknames(row.get("Nickname:"))
 
             players.append(player)
         return sorted(players, key=lambda x: x["draft_value"], reverse=True)
 
 
 
+def parse_nicknames(value):
+    if not value:
+        return []
+    return [nickname.strip() for nickname in value.split(",") if nickname.strip()]
+
+
 def arbitrary_formula(mmr_value):
     return 10000 - (mmr_value * 100)
 
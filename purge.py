@@ -0,0 +1,71 @@
+import asyncio
+
+import discord
+
+PURGE_INTERVAL = 1.0  # seconds
+# Discord's bulk delete takes 2 to 100 messages at a time
+BULK_DELETE_MAX = 100
+
+
+class PurgeQueue:
+    """Collects messages to delete and removes them in bulk.
+
+    Messages are grouped per channel and deleted every PURGE_INTERVAL with
+    one bulk-delete call per hundred messages (a lone message still needs a
+    plain delete), instead of one call per message.
+    """
+
+    def __init__(self, interval=PURGE_INTERVAL):
+        self.interval = interval
+        self.pending = {}
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+        self.queued = 0
+        self.api_calls = 0
+        self.failures = 0
+
+    def add(self, message):
+        channel_id = message.channel.id
+        if channel_id not in self.pending:
+            self.pending[channel_id] = (message.channel, [])
+        self.pending[channel_id][1].append(message)
+        self.queued += 1
+        self.wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            await self.wakeup.wait()
+            # Let a burst of chatter pile up into one call
+            await asyncio.sleep(self.interval)
+            self.wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        pending, self.pending = self.pending, {}
+        for channel, messages in pending.values():
+            for i in range(0, len(messages), BULK_DELETE_MAX):
+                batch = messages[i:i + BULK_DELETE_MAX]
+                self.api_calls += 1
+                try:
+                    if len(batch) == 1:
+                        await batch[0].delete()
+                    else:
+                        await channel.delete_messages(batch)
+                except discord.HTTPException as e:
+                    self.failures += 1
+                    print(f"Failed to delete {len(batch)} messages: {e!r}")
+
+    def stats(self):
+        return dict(
+            deleted=self.queued,
+            api_calls=self.api_calls,
+            api_calls_saved=self.queued - self.api_calls,
+            failures=self.failures,
+        )
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
@@ -0,0 +1,55 @@
+class Roster:
+    def __init__(self):
+        self.nominations = []
+        self.spent = 0
+        self.total_mmr = 0
+
+    def __len__(self):
+        return len(self.nominations)
+
+
+class RosterIndex:
+    """Each captain's team, kept up to date as lots are awarded and undone.
+
+    Rosters are keyed by captain name and hold the Nominations in the order
+    they were won, along with running totals so nothing has to be recounted.
+    """
+
+    def __init__(self):
+        self.rosters = {}
+
+    def add(self, nomination):
+        roster = self.rosters.setdefault(nomination.captain, Roster())
+        roster.nominations.append(nomination)
+        roster.spent += nomination.amount_paid
+        roster.total_mmr += nomination.player_mmr
+
+    def remove(self, nomination):
+        roster = self.rosters[nomination.captain]
+        # Undo almost always pops the most recent pick, so look from the end.
+        for i in range(len(roster.nominations) - 1, -1, -1):
+            if roster.nominations[i].lot_id == nomination.lot_id:
+                del roster.nominations[i]
+                break
+        roster.spent -= nomination.amount_paid
+        roster.total_mmr -= nomination.player_mmr
+        if not roster.nominations:
+            del self.rosters[nomination.captain]
+
+    def rebuild(self, nominations):
+        self.rosters = {}
+        for nomination in nominations:
+            self.add(nomination)
+
+    def get(self, captain_name):
+        return self.rosters.get(captain_name)
+
+    def count(self, captain_name):
+        roster = self.rosters.get(captain_name)
+        return len(roster) if roster else 0
+
+    def items(self):
+        return self.rosters.items()
+
+    def teams(self):
+        return {name: roster.nominations for name, roster in self.rosters.items()}
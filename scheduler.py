@@ -0,0 +1,43 @@
+class NominationScheduler:
+    """Round-robin nomination order as a ring of captain names and a cursor.
+
+    The cursor only ever moves forward by one slot per lot (or per skipped
+    captain), and an undo puts it back where it was; Auction sets it directly
+    so journal replay lands on the same slots. Nothing but the cursor and the
+    round counter changes during a draft.
+    """
+
+    def __init__(self, order=None, cursor=0):
+        self.order = list(order or [])
+        self.cursor = cursor
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(order=d["order"], cursor=d["cursor"])
+
+    def to_dict(self):
+        return dict(order=self.order, cursor=self.cursor, round=self.round)
+
+    @property
+    def round(self):
+        if not self.order:
+            return 0
+        return self.cursor // len(self.order)
+
+    def current(self):
+        if not self.order:
+            return None
+        return self.order[self.cursor % len(self.order)]
+
+    def next_eligible(self, is_full):
+        """Skips past captains with full teams, returns None once all are full.
+
+        Skipped slots are used up for good, so the skipping is amortized over
+        the lots that follow.
+        """
+        for _ in range(len(self.order)):
+            name = self.current()
+            if not is_full(name):
+                return name
+            self.cursor += 1
+        return None
@@ -1,2 +1,5 @@
+import atexit
+
 import draft
-auction = draft.make_auction_for_shell()
\ No newline at end of file
+auction = draft.make_auction_for_shell()
+atexit.register(auction.flush)
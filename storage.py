@@ -0,0 +1,485 @@
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+FLUSH_INTERVAL = 2  # seconds
+
+
+@contextlib.contextmanager
+def timed(store, op):
+    """Records how long the block took in metrics.STORAGE_LATENCY."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.STORAGE_LATENCY.observe(time.perf_counter() - start, store.kind, op)
+
+
+class Store:
+    """What Auction persists its state through.
+
+    A store is a mapping from keys ("captains", "players", "nominations",
+    "bids", "nomination_schedule") to JSON-able values, plus record-level
+    hooks for changes to a single entry of one of the lists. The hooks get
+    the whole list too, so a plain key-value store can just write it back,
+    while a store with real tables only touches the one row.
+
+    Stores backed by a real db time their calls to it (see timed) under
+    their kind.
+    """
+
+    kind = None
+
+    def keys(self):
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        raise NotImplementedError
+
+    def __setitem__(self, key, value):
+        raise NotImplementedError
+
+    def __delitem__(self, key):
+        raise NotImplementedError
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def update_record(self, key, record, collection):
+        self[key] = collection
+
+    def append_record(self, key, record, collection):
+        self[key] = collection
+
+    def remove_record(self, key, record, collection):
+        self[key] = collection
+
+    def flush(self):
+        return 0
+
+    def stats(self):
+        return {}
+
+
+class MemoryStore(Store):
+    """Keeps everything in a dict, for drafts whose state lives elsewhere."""
+
+    def __init__(self):
+        self.data = {}
+
+    def keys(self):
+        return list(self.data)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+
+class WriteBehindStore(Store):
+    """Buffers writes to a dict-like db and flushes each dirty key once.
+
+    Setting a key only marks it dirty; the latest value for every dirty key is
+    written out on flush(), so several writes of the same list between flushes
+    cost a single PUT. Reads see buffered values first. Callers are expected
+    to flush on an interval and at points that must be durable, which bounds
+    what a crash can lose to one flush window.
+    """
+
+    kind = "kv"
+
+    def __init__(self, db, flush_interval=FLUSH_INTERVAL, clock=time.monotonic):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.dirty = {}
+        self.last_flush = clock()
+
+        self.writes_requested = 0
+        self.writes_flushed = 0
+        self.flushes = 0
+
+    def __getitem__(self, key):
+        if key in self.dirty:
+            return self.dirty[key]
+        with timed(self, "read"):
+            return self.read_db(key)
+
+    def read_db(self, key):
+        get_raw = getattr(self.db, "get_raw", None)
+        if get_raw is not None:
+            # replit's __getitem__ returns observed objects that write the
+            # whole key back on every mutation, which would skip the buffer.
+            return json.loads(get_raw(key))
+        return self.db[key]
+
+    def __setitem__(self, key, value):
+        self.dirty[key] = value
+        self.writes_requested += 1
+
+    def __delitem__(self, key):
+        was_dirty = self.dirty.pop(key, None) is not None
+        try:
+            with timed(self, "delete"):
+                del self.db[key]
+        except KeyError:
+            if not was_dirty:
+                raise
+
+    def __contains__(self, key):
+        return key in self.dirty or key in self.db
+
+    def keys(self):
+        keys = list(self.db.keys())
+        keys.extend(key for key in self.dirty if key not in keys)
+        return keys
+
+    def flush(self):
+        """Writes every dirty key to the db, returns how many were written."""
+        batch = self.take_dirty()
+        if not batch:
+            return 0
+        try:
+            with timed(self, "write"):
+                self.write_batch(batch)
+        except Exception:
+            self.restore_dirty(batch)
+            raise
+        self.mark_flushed(batch)
+        return len(batch)
+
+    # flush() in three steps, so that the db call in the middle can run on
+    # another thread (see AsyncStore) while the rest stays on the caller's.
+
+    def take_dirty(self):
+        """Clears the dirty set and returns it JSON-encoded.
+
+        Encoding here means the batch no longer shares any objects with the
+        live Auction state, so it can be written from another thread.
+        """
+        dirty, self.dirty = self.dirty, {}
+        self.last_flush = self.clock()
+        return {key: json.dumps(value) for key, value in dirty.items()}
+
+    def write_batch(self, batch):
+        set_bulk_raw = getattr(self.db, "set_bulk_raw", None)
+        if set_bulk_raw is not None:
+            set_bulk_raw(batch)
+            return
+        for key, value in batch.items():
+            self.db[key] = json.loads(value)
+
+    def restore_dirty(self, batch):
+        # Keep anything that didn't make it for the next flush, without
+        # clobbering values written since.
+        for key, value in batch.items():
+            self.dirty.setdefault(key, json.loads(value))
+
+    def mark_flushed(self, batch):
+        self.writes_flushed += len(batch)
+        self.flushes += 1
+
+    def maybe_flush(self):
+        if self.clock() - self.last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    @property
+    def writes_avoided(self):
+        return self.writes_requested - self.writes_flushed - len(self.dirty)
+
+    def stats(self):
+        return dict(
+            writes_requested=self.writes_requested,
+            writes_flushed=self.writes_flushed,
+            writes_avoided=self.writes_avoided,
+            flushes=self.flushes,
+            dirty_keys=len(self.dirty),
+        )
+
+
+class AsyncStore:
+    """Runs a WriteBehindStore's db calls on a worker thread.
+
+    Meant for use from the bot's event loop: encoding the dirty keys happens
+    on the loop, the HTTP call itself happens in the executor. A single worker
+    keeps batches in order (and reuses the db client's keep-alive session).
+
+    Only one batch is in flight at a time, from take_dirty() until its write
+    has finished: if an older batch could fail after a newer one was taken,
+    restoring it would put stale values back over the newer ones.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auction-db")
+        self._lock = None
+        self._flush_task = None
+
+        self.flush_count = 0
+        self.last_flush_latency = 0
+        self.max_flush_latency = 0
+
+    @property
+    def lock(self):
+        # Created lazily so it belongs to the loop that first flushes
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def flush(self):
+        async with self.lock:
+            batch = self.store.take_dirty()
+            if not batch:
+                return 0
+            loop = asyncio.get_event_loop()
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(self.executor, self.store.write_batch, batch)
+            except BaseException:
+                # Including cancellation at shutdown: the write may or may not
+                # have landed, so keep the batch for the final flush
+                self.store.restore_dirty(batch)
+                raise
+            finally:
+                self.last_flush_latency = time.perf_counter() - start
+                metrics.STORAGE_LATENCY.observe(self.last_flush_latency, self.store.kind, "write")
+                self.max_flush_latency = max(self.max_flush_latency, self.last_flush_latency)
+            self.store.mark_flushed(batch)
+            self.flush_count += 1
+            return len(batch)
+
+    def request_flush(self):
+        """Starts a flush in the background unless one is already running."""
+        if self._flush_task is not None and not self._flush_task.done():
+            return self._flush_task
+        self._flush_task = asyncio.ensure_future(self.flush())
+        self._flush_task.add_done_callback(self._report_failure)
+        return self._flush_task
+
+    def _report_failure(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background db flush failed, will retry: {task.exception()!r}")
+
+    async def get(self, key):
+        if key in self.store.dirty:
+            return self.store.dirty[key]
+        loop = asyncio.get_event_loop()
+        # Timed here rather than in the worker, so metrics stay on the loop
+        with timed(self.store, "read"):
+            return await loop.run_in_executor(self.executor, self.store.read_db, key)
+
+    def stats(self):
+        return dict(
+            self.store.stats(),
+            async_flushes=self.flush_count,
+            last_flush_latency=self.last_flush_latency,
+            max_flush_latency=self.max_flush_latency,
+        )
+
+    def close(self):
+        """Waits for any batch already handed to the worker to be written."""
+        self.executor.shutdown(wait=True)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captains (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    dollars REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    mmr REAL NOT NULL,
+    is_picked INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_remaining ON players (is_picked, mmr);
+CREATE TABLE IF NOT EXISTS nominations (
+    lot_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    player_name TEXT NOT NULL,
+    player_mmr REAL NOT NULL,
+    nominator TEXT NOT NULL,
+    captain TEXT NOT NULL,
+    amount_paid REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nominations_captain ON nominations (captain);
+CREATE TABLE IF NOT EXISTS bids (
+    position INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+NOMINATION_COLUMNS = ["lot_id", "player_name", "player_mmr", "nominator", "captain", "amount_paid"]
+
+
+class SQLiteStore(Store):
+    """Local SQLite store, in WAL mode, with one table per Auction list.
+
+    Whole-list writes replace a table's rows; the record hooks insert, update
+    or delete a single row, so e.g. picking a player is one UPDATE. Keys that
+    aren't lists of records (like the nomination schedule) live in `kv`.
+    """
+
+    kind = "sqlite"
+    tables = ["captains", "players", "nominations", "bids"]
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        self.statements = 0
+
+    def _execute(self, sql, params=()):
+        self.statements += 1
+        return self.conn.execute(sql, params)
+
+    def _present_tables(self):
+        # A table key only exists once something was written to it, which
+        # is tracked in kv so that an empty list still counts as set.
+        rows = self._execute("SELECT key FROM kv WHERE key LIKE 'table:%'").fetchall()
+        return [row[0][len("table:"):] for row in rows]
+
+    def keys(self):
+        rows = self._execute("SELECT key FROM kv WHERE key NOT LIKE 'table:%'").fetchall()
+        return self._present_tables() + [row[0] for row in rows]
+
+    def __contains__(self, key):
+        if key in self.tables:
+            key = "table:" + key
+        row = self._execute("SELECT 1 FROM kv WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def __getitem__(self, key):
+        with timed(self, "read"):
+            return self._read(key)
+
+    def _read(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key == "captains":
+            rows = self._execute("SELECT dollars, data FROM captains ORDER BY position")
+            return [dict(json.loads(data), dollars=dollars) for dollars, data in rows]
+        if key == "players":
+            rows = self._execute("SELECT mmr, is_picked, data FROM players ORDER BY position")
+            return [
+                dict(json.loads(data), mmr=mmr, is_picked=bool(is_picked))
+                for mmr, is_picked, data in rows
+            ]
+        if key == "nominations":
+            columns = ", ".join(NOMINATION_COLUMNS)
+            rows = self._execute(f"SELECT {columns} FROM nominations ORDER BY position")
+            return [list(row) for row in rows]
+        if key == "bids":
+            rows = self._execute("SELECT data FROM bids ORDER BY position")
+            return [json.loads(data) for data, in rows]
+        (value,) = self._execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(value)
+
+    def __setitem__(self, key, value):
+        with timed(self, "write"), self.conn:
+            if key in self.tables:
+                self._execute(f"DELETE FROM {key}")
+                for position, record in enumerate(value):
+                    self._insert(key, position, record)
+                key, value = "table:" + key, None
+            self._execute(
+                "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        with timed(self, "delete"), self.conn:
+            if key in self.tables:
+                self._execute(f"DELETE FROM {key}")
+                key = "table:" + key
+            self._execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def _insert(self, key, position, record):
+        if key == "captains":
+            self._execute(
+                "INSERT INTO captains (name, position, dollars, data) VALUES (?, ?, ?, ?)",
+                (record["name"], position, record["dollars"], json.dumps(record)),
+            )
+        elif key == "players":
+            self._execute(
+                "INSERT INTO players (name, position, mmr, is_picked, data) VALUES (?, ?, ?, ?, ?)",
+                (record["name"], position, record["mmr"], record["is_picked"], json.dumps(record)),
+            )
+        elif key == "nominations":
+            self._execute(
+                "INSERT INTO nominations (position, lot_id, player_name, player_mmr, nominator, captain, amount_paid)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [position] + list(record),
+            )
+        elif key == "bids":
+            self._execute(
+                "INSERT INTO bids (position, data) VALUES (?, ?)",
+                (position, json.dumps(record)),
+            )
+
+    def append_record(self, key, record, collection):
+        if key not in self.tables:
+            return super().append_record(key, record, collection)
+        with timed(self, "write"), self.conn:
+            # Undo can leave gaps, so append after the current last position
+            (position,) = self._execute(f"SELECT COALESCE(MAX(position), -1) + 1 FROM {key}").fetchone()
+            self._insert(key, position, record)
+            self._execute("INSERT OR IGNORE INTO kv (key, value) VALUES (?, 'null')", ("table:" + key,))
+
+    def update_record(self, key, record, collection):
+        if key not in ("captains", "players"):
+            return super().update_record(key, record, collection)
+        with timed(self, "write"), self.conn:
+            if key == "captains":
+                self._execute(
+                    "UPDATE captains SET dollars = ?, data = ? WHERE name = ?",
+                    (record["dollars"], json.dumps(record), record["name"]),
+                )
+            else:
+                self._execute(
+                    "UPDATE players SET mmr = ?, is_picked = ?, data = ? WHERE name = ?",
+                    (record["mmr"], record["is_picked"], json.dumps(record), record["name"]),
+                )
+
+    def remove_record(self, key, record, collection):
+        if key != "nominations":
+            return super().remove_record(key, record, collection)
+        # Positions only need to stay ordered, so gaps left behind are fine
+        with timed(self, "write"), self.conn:
+            self._execute("DELETE FROM nominations WHERE lot_id = ?", (record.lot_id,))
+
+    def stats(self):
+        return dict(statements=self.statements)
+
+    def close(self):
+        self.conn.close()
+
+
+def open_store_from_env():
+    """SQLite store if AUCTION_SQLITE_PATH is set, else None for the replit db."""
+    path = os.getenv("AUCTION_SQLITE_PATH")
+    if not path:
+        return None
+    return SQLiteStore(path)
@@ -0,0 +1,19 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import auction
+
+
+@pytest.fixture
+def bot():
+    """An AuctionBot on an in-memory db, with its periodic flush stopped."""
+    async def make():
+        bot = auction.AuctionBot(mock.Mock())
+        bot.flush_db.cancel()
+        return bot
+
+    with mock.patch.object(auction, "open_store_from_env", return_value={}), \
+            mock.patch.object(auction, "open_journal_from_env", return_value=None):
+        return asyncio.run(make())
@@ -0,0 +1,84 @@
+"""Stand-in for the replit key-value HTTP server, for tests.
+
+Speaks enough of the protocol for replit.database.Database: form-encoded
+POST / to set keys, GET /<key>, GET /?prefix=&encode=true to list keys, and
+DELETE (by path, or with a multipart "key" field as newer clients send it).
+`delay` adds latency to every request to stand in for the network.
+"""
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class KVServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay=0):
+        super().__init__(("127.0.0.1", 0), KVHandler)
+        self.data = {}
+        self.delay = delay
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class KVHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=""):
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _begin(self):
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.delay)
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length).decode() if length else ""
+
+    def do_GET(self):
+        self._begin()
+        url = urllib.parse.urlsplit(self.path)
+        key = urllib.parse.unquote(url.path[1:])
+        if key:
+            if key not in self.server.data:
+                return self._reply(404)
+            return self._reply(200, self.server.data[key])
+        prefix = urllib.parse.parse_qs(url.query).get("prefix", [""])[0]
+        keys = [k for k in self.server.data if k.startswith(prefix)]
+        return self._reply(200, "\n".join(urllib.parse.quote(k) for k in keys))
+
+    def do_POST(self):
+        body = self._begin()
+        for key, value in urllib.parse.parse_qsl(body, keep_blank_values=True):
+            self.server.data[key] = value
+        self._reply(200)
+
+    def do_DELETE(self):
+        body = self._begin()
+        key = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path[1:])
+        if not key:
+            # multipart/form-data with a single "key" field
+            key = body.split("\r\n\r\n", 1)[1].split("\r\n", 1)[0]
+        if self.server.data.pop(key, None) is None:
+            return self._reply(404)
+        self._reply(200)
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from actor import AuctionActor, snowflake_at, snowflake_time
+
+
+def test_snowflake_round_trip():
+    now = time.time()
+    assert snowflake_time(snowflake_at(now)) == pytest.approx(now, abs=0.001)
+    # A real message id from the Discord docs
+    assert snowflake_time(175928847299117063) == pytest.approx(1462015105.796)
+
+
+def test_commands_apply_in_snowflake_order():
+    async def go():
+        actor = AuctionActor(reorder_window=0.02)
+        applied = []
+        futures = [
+            actor.submit(applied.append, snowflake, snowflake=snowflake)
+            for snowflake in (30, 10, 20)
+        ]
+        await asyncio.gather(*futures)
+        await actor.stop()
+        return applied
+
+    assert asyncio.run(go()) == [10, 20, 30]
+
+
+def test_results_and_errors_come_back_through_futures():
+    async def go():
+        actor = AuctionActor(reorder_window=0)
+        assert await actor.submit(lambda a, b: a + b, 1, 2) == 3
+        with pytest.raises(ValueError):
+            await actor.submit(int, "not a number")
+        stats = actor.stats()
+        await actor.stop()
+        return stats
+
+    stats = asyncio.run(go())
+    assert stats["processed"] == 2
+    assert stats["depth"] == 0
+    assert stats["max_depth"] == 1
+
+
+def test_cancelled_commands_are_skipped():
+    async def go():
+        actor = AuctionActor(reorder_window=0.01)
+        applied = []
+        first = actor.submit(applied.append, "first")
+        second = actor.submit(applied.append, "second")
+        first.cancel()
+        await second
+        await actor.stop()
+        return applied
+
+    assert asyncio.run(go()) == ["second"]
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from replit.database import Database
+
+from draft import Auction
+from loop_monitor import LoopStallMonitor
+from storage import AsyncStore, WriteBehindStore
+from tests.kv_server import KVServer
+
+
+def test_kv_server_speaks_replit_protocol():
+    with KVServer() as server:
+        db = Database(server.url)
+        db["players"] = [{"name": "Scrub"}]
+        assert db.get_raw("players") == '[{"name":"Scrub"}]'
+        assert list(db.keys()) == ["players"]
+        del db["players"]
+        assert "players" not in db
+        db.close()
+
+
+def test_async_flush_does_not_block_loop():
+    with KVServer(delay=0.3) as server:
+        db = Database(server.url)
+        auction = Auction(db=WriteBehindStore(db))
+        for i in range(20):
+            auction.addPlayer(f"player {i}", i)
+        async_store = AsyncStore(auction.db)
+        monitor = LoopStallMonitor(interval=0.01)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            flushed = await async_store.flush()
+            monitor.stop()
+            return flushed
+
+        start = time.perf_counter()
+        assert asyncio.run(run()) == 1
+        assert time.perf_counter() - start >= 0.3
+        assert monitor.max_stall < 0.1
+        assert async_store.last_flush_latency >= 0.3
+
+        reloaded = Auction(db=WriteBehindStore(db))
+        assert len(reloaded.players) == 20
+        async_store.close()
+        db.close()
+
+
+def test_state_change_hands_flush_to_background():
+    auction = Auction(db={})
+    async_store = AsyncStore(auction.db)
+    auction.flush_in_background = async_store.request_flush
+
+    async def run():
+        auction.addCaptain("Cev", 1000)
+        auction.machine.start_machine()
+        assert "captains" not in auction.db.db
+        await async_store.request_flush()
+
+    asyncio.run(run())
+    assert auction.db.db["captains"][0]["name"] == "Cev"
+    async_store.close()
+
+
+def test_cancelled_flush_keeps_its_batch():
+    started, release = threading.Event(), threading.Event()
+
+    class SlowDB(dict):
+        def __setitem__(self, key, value):
+            started.set()
+            release.wait(5)
+            super().__setitem__(key, value)
+
+    store = WriteBehindStore(SlowDB())
+    store["captains"] = [{"name": "Cev"}]
+    async_store = AsyncStore(store)
+
+    async def run():
+        flush = asyncio.ensure_future(async_store.flush())
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+    asyncio.run(run())
+    assert "captains" in store.dirty
+    release.set()
+    # Shutdown order: drain the worker, then the final flush
+    async_store.close()
+    assert store.flush() == 1
+    assert store.db["captains"] == [{"name": "Cev"}]
+
+
+def test_failed_batch_never_overwrites_a_newer_one():
+    class FlakyDB(dict):
+        fail = True
+
+        def __setitem__(self, key, value):
+            time.sleep(0.02)
+            if self.fail:
+                self.fail = False
+                raise ConnectionError("db down")
+            super().__setitem__(key, value)
+
+    store = WriteBehindStore(FlakyDB())
+    async_store = AsyncStore(store)
+
+    async def run():
+        store["players"] = ["v1"]
+        older = asyncio.ensure_future(async_store.flush())
+        await asyncio.sleep(0)
+        store["players"] = ["v2"]
+        newer = asyncio.ensure_future(async_store.flush())
+        results = await asyncio.gather(older, newer, return_exceptions=True)
+        assert isinstance(results[0], ConnectionError)
+        await async_store.flush()
+
+    asyncio.run(run())
+    async_store.close()
+    assert store.db["players"] == ["v2"]
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from unittest import mock
 
@@ -6,6 +8,7 @@ from draft import ClientMessageType
 from draft import InsufficientFundsError
 from draft import TooLowBidError
 from draft import BidAgainstSelfError
+from draft import LateBidError
 from auction import Auction
 from auction import ADMIN_IDS
 from lot import TWO_CAPTAINS_MODE_TIMER
@@ -424,3 +427,262 @@ def test_pop_nomination(running_auction):
     assert captain["dollars"] == starting_dollars + popped_nomination.amount_paid
 
     assert running_auction.get_next_captain()["name"] == "yfu"
+
+
+@pytest.fixture
+def small_auction():
+    auction = Auction(db={})
+    auction.addCaptain("Cev", 1000)
+    auction.addCaptain("Vuvuzela Virtuoso Hans Rudolph", 900)
+    auction.addPlayer("Linkdx {noflamevow}", 5000)
+    auction.addPlayer("ZombiesExpert ", 4000)
+    auction.addPlayer("Scrub", 3000)
+    return auction
+
+
+def test_search_uses_name_index(small_auction):
+    assert small_auction.search_player("scrub")["name"] == "Scrub"
+    assert small_auction.search_player("linkdx noflamevow")["name"] == "Linkdx {noflamevow}"
+    assert small_auction.search_player("ZombiesExpert")["name"] == "ZombiesExpert "
+    assert small_auction.search_captain("vuvuzela virtuoso hans rudolph")["dollars"] == 900
+    assert small_auction.search_player("") is None
+    assert small_auction.search_captain("nobody") is None
+
+
+def test_name_index_follows_db(small_auction):
+    assert not small_auction.addPlayer("SCRUB", 1)
+    assert len(small_auction.players) == 3
+
+    reloaded = Auction(db=small_auction.db)
+    assert reloaded.search_player("scrub") is reloaded.players[2]
+
+    small_auction.clearPlayers()
+    assert small_auction.search_player("Scrub") is None
+    small_auction.delete_db()
+    assert small_auction.search_captain("Cev") is None
+
+
+def test_parse_nomination_player_and_captain(small_auction):
+    message_body = small_auction.parse_message_for_names(
+        mock.Mock(content="!nominate linkdx {noflamevow} Vuvuzela Virtuoso Hans Rudolph")
+    )
+    assert message_body["player"] == "Linkdx {noflamevow}"
+    assert message_body["captain"] == "Vuvuzela Virtuoso Hans Rudolph"
+
+    message_body = small_auction.parse_message_for_names(
+        mock.Mock(content="!nominate ZombiesExpert")
+    )
+    assert message_body["player"] == "ZombiesExpert "
+    assert message_body["captain"] is None
+
+
+def test_parse_nomination_matches_names_added_later(small_auction):
+    message = mock.Mock(content="!nominate Scrub Lord Cev")
+    assert small_auction.parse_message_for_names(message)["player"] == "Scrub"
+
+    small_auction.addPlayer("Scrub Lord", 2000)
+    message_body = small_auction.parse_message_for_names(message)
+    assert message_body["player"] == "Scrub Lord"
+    assert message_body["captain"] == "Cev"
+
+
+def test_parse_nomination_splits_off_the_longest_trailing_captain(small_auction):
+    message_body = small_auction.parse_message_for_names(
+        mock.Mock(content="!nominate Zombiesxpert vuvuzela virtuoso hans rudolph")
+    )
+    assert message_body["player"] is None
+    assert message_body["captain"] == "Vuvuzela Virtuoso Hans Rudolph"
+    assert message_body["player_query"] == "Zombiesxpert"
+
+    # The whole message is never taken as the captain
+    message_body = small_auction.parse_message_for_names(mock.Mock(content="!nominate Cev"))
+    assert message_body["captain"] is None
+    assert message_body["player_query"] == "Cev"
+
+
+def _start_nominating(auction):
+    auction.start(
+        message=mock.Mock(content="!start", author=mock.Mock(id=ADMIN_IDS[0]))
+    )
+    auction.machine.nom_from_start()
+
+
+def test_nominate_resolves_close_typo(small_auction):
+    _start_nominating(small_auction)
+    lot = small_auction.nominate(
+        message=mock.Mock(content="!nominate Zombiesxpert Cev", author=mock.Mock(id=ADMIN_IDS[0]))
+    )
+    assert lot.player == "ZombiesExpert "
+    assert lot.nominator == "Cev"
+
+
+def test_nominate_unknown_player_suggests_names(small_auction):
+    _start_nominating(small_auction)
+    with pytest.raises(AuctionValidationError) as e:
+        small_auction.nominate(
+            message=mock.Mock(content="!nominate Linkdk Cev", author=mock.Mock(id=ADMIN_IDS[0]))
+        )
+    assert "Linkdx {noflamevow}" in e.value.client_message.data
+
+
+def test_nominate_by_nickname(small_auction):
+    small_auction.addPlayer("Chowmein Supreme", 2500, nicknames=["Chowmeins"])
+    _start_nominating(small_auction)
+    lot = small_auction.nominate(
+        message=mock.Mock(content="!nominate chowmeins Cev", author=mock.Mock(id=ADMIN_IDS[0]))
+    )
+    assert lot.player == "Chowmein Supreme"
+    assert Auction(db=small_auction.db).search_player("Chowmeins")["name"] == "Chowmein Supreme"
+
+
+def _award_lot(auction, nomination, bids=()):
+    admin = mock.Mock(id=ADMIN_IDS[0])
+    auction.nominate(message=mock.Mock(content=nomination, author=admin))
+    auction.machine.buff_from_nom()
+    auction.machine.bid_from_buff()
+    for bid in bids:
+        assert auction.bid(message=mock.Mock(content=bid, author=admin))
+    for _ in auction.run_current_lot():
+        pass
+    return auction.give_lot_to_winner()
+
+
+def test_rosters_follow_awards_and_undo(small_auction):
+    _start_nominating(small_auction)
+    _award_lot(small_auction, "!nominate Scrub Cev", ["!bid 100 Cev"])
+    _award_lot(small_auction, "!nominate ZombiesExpert Cev", ["!bid 50 Cev"])
+
+    roster = small_auction.rosters.get("Cev")
+    assert [n.player_name for n in roster.nominations] == ["Scrub", "ZombiesExpert "]
+    assert roster.spent == 150
+    assert roster.total_mmr == 7000
+    assert list(small_auction.get_current_teams()) == ["Cev"]
+
+    reloaded = Auction(db=small_auction.db)
+    assert reloaded.rosters.count("Cev") == 2
+    assert reloaded.rosters.get("Cev").spent == 150
+
+    small_auction.pop_recent_nomination()
+    assert small_auction.rosters.count("Cev") == 1
+    assert small_auction.rosters.get("Cev").spent == 100
+
+
+def test_nomination_schedule_round_robin(small_auction):
+    _start_nominating(small_auction)
+    assert small_auction.db["nomination_schedule"] == dict(
+        order=["Cev", "Vuvuzela Virtuoso Hans Rudolph"], cursor=0, round=0
+    )
+    assert small_auction.get_next_captain()["name"] == "Cev"
+
+    _award_lot(small_auction, "!nominate Scrub Cev")
+    assert not small_auction.is_end_of_round()
+    assert small_auction.get_next_captain()["name"] == "Vuvuzela Virtuoso Hans Rudolph"
+
+    _award_lot(small_auction, "!nominate ZombiesExpert Cev")
+    assert small_auction.is_end_of_round()
+    assert small_auction.scheduler.round == 1
+
+    small_auction.pop_recent_nomination()
+    assert small_auction.get_next_captain()["name"] == "Vuvuzela Virtuoso Hans Rudolph"
+    assert Auction(db=small_auction.db).scheduler.cursor == 1
+
+
+def test_nomination_schedule_skips_full_teams(small_auction):
+    vuvu = "Vuvuzela Virtuoso Hans Rudolph"
+    with mock.patch("draft.TEAM_SIZE", 2):
+        _start_nominating(small_auction)
+        _award_lot(small_auction, "!nominate Scrub Cev")
+        _award_lot(small_auction, f"!nominate ZombiesExpert {vuvu}")
+        _award_lot(small_auction, "!nominate Linkdx {noflamevow} Cev", [f"!bid 10 {vuvu}"])
+
+        assert small_auction.scheduler.current() == vuvu
+        # Skipping vuvu's full team finishes the round
+        assert small_auction.is_end_of_round()
+        assert small_auction.get_next_captain()["name"] == "Cev"
+        assert small_auction.scheduler.cursor == 4
+
+        small_auction.addPlayer("Late Signup", 1000)
+        _award_lot(small_auction, "!nominate Late Signup Cev")
+        assert small_auction.get_next_captain() is None
+
+
+def test_late_bids_resolve_in_send_order(small_auction):
+    from actor import snowflake_at
+
+    _start_nominating(small_auction)
+    admin = mock.Mock(id=ADMIN_IDS[0])
+    small_auction.nominate(message=mock.Mock(content="!nominate Scrub Cev", author=admin))
+    small_auction.machine.buff_from_nom()
+    small_auction.machine.bid_from_buff()
+    lot = small_auction.current_lot
+    lot.start_clock(30)
+
+    lot.deadline = lot.clock() - 0.2
+    assert lot.begin_close()
+    deadline_wall = time.time() - 0.2
+
+    def bid_sent_at(content, sent_at):
+        return mock.Mock(content=content, author=admin, id=snowflake_at(sent_at))
+
+    # Processed out of order, but Vuvu's 200 was sent first so Cev's is too low
+    assert small_auction.bid(bid_sent_at("!bid 200 Cev", deadline_wall - 0.5)) == 0
+    assert small_auction.bid(bid_sent_at("!bid 200 Vuvuzela Virtuoso Hans Rudolph", deadline_wall - 1)) == 0
+    with pytest.raises(LateBidError):
+        small_auction.bid(bid_sent_at("!bid 300 Cev", deadline_wall + 0.1))
+
+    [rejected] = small_auction.close_current_lot()
+    assert rejected.type == ClientMessageType.CHANNEL_MESSAGE
+    assert rejected.data.startswith("Late bid '!bid 200 Cev' didn't count")
+    assert lot.winning_bid == dict(
+        captain="Vuvuzela Virtuoso Hans Rudolph", amount=200, player="Scrub"
+    )
+    assert small_auction.machine.state == "nominating"
+
+
+def test_render_cache_follows_auction_version(small_auction):
+    import embed
+
+    version = small_auction.version
+    first = embed.playerlist(auction=small_auction)
+    assert embed.playerlist(auction=small_auction) is first
+    assert [p["name"] for p in small_auction.player_pool.players] == [
+        "Linkdx {noflamevow}", "ZombiesExpert ", "Scrub"
+    ]
+
+    _start_nominating(small_auction)
+    _award_lot(small_auction, "!nominate Scrub Cev", ["!bid 100 Cev"])
+    assert small_auction.version > version
+    assert [p["name"] for p in small_auction.player_pool.players] == [
+        "Linkdx {noflamevow}", "ZombiesExpert "
+    ]
+    second = embed.playerlist(auction=small_auction)
+    assert second is not first
+    assert "Scrub" not in second.fields[0].value
+
+    small_auction.pop_recent_nomination()
+    assert small_auction.player_pool.players[-1]["name"] == "Scrub"
+
+
+def test_bid_after_the_deadline_never_extends_it(small_auction):
+    from actor import snowflake_at
+
+    _start_nominating(small_auction)
+    admin = mock.Mock(id=ADMIN_IDS[0])
+    small_auction.nominate(message=mock.Mock(content="!nominate Scrub Cev", author=admin))
+    small_auction.machine.buff_from_nom()
+    small_auction.machine.bid_from_buff()
+    lot = small_auction.current_lot
+    lot.start_clock(30)
+    # The driver hasn't noticed the deadline yet
+    lot.deadline = lot.clock() - 0.5
+    deadline = lot.deadline
+    deadline_wall = time.time() - 0.5
+
+    late = mock.Mock(content="!bid 100 Cev", author=admin, id=snowflake_at(deadline_wall + 0.3))
+    with pytest.raises(LateBidError):
+        small_auction.bid(late)
+    in_time = mock.Mock(content="!bid 100 Cev", author=admin, id=snowflake_at(deadline_wall - 0.1))
+    assert small_auction.bid(in_time) == 0
+
+    assert lot.closing and lot.deadline == deadline
+    assert lot.current_bids == []
@@ -0,0 +1,56 @@
+import asyncio
+from unittest import mock
+
+import discord
+
+from board import AuctionBoard
+
+
+def _board(render):
+    message = mock.Mock()
+    message.pin = mock.AsyncMock()
+    message.edit = mock.AsyncMock()
+    send = mock.AsyncMock(return_value=message)
+    return AuctionBoard(render, send, interval=0.02), send, message
+
+
+def test_board_is_sent_once_then_edited_on_change():
+    async def go():
+        text = ["Cev is up"]
+        board, send, message = _board(lambda: discord.Embed(description=text[0]))
+        assert await board.update()
+        send.assert_awaited_once()
+        message.pin.assert_awaited_once()
+
+        assert not await board.update()
+        message.edit.assert_not_awaited()
+
+        text[0] = "Bidding on toth"
+        assert await board.update()
+        message.edit.assert_awaited_once()
+        return board.stats()
+
+    assert asyncio.run(go()) == dict(renders=3, edits=2)
+
+
+def test_refreshes_are_coalesced_and_throttled():
+    async def go():
+        count = [0]
+
+        def render():
+            return discord.Embed(description=str(count[0]))
+
+        board, send, message = _board(render)
+        board.refresh()
+        await asyncio.sleep(0.01)
+        for _ in range(50):
+            count[0] += 1
+            board.refresh()
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.1)
+        board.close()
+        return board.stats(), message.edit.await_args.kwargs["embed"].description
+
+    stats, last = asyncio.run(go())
+    assert stats["edits"] <= 3
+    assert last == "50"
@@ -0,0 +1,142 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import auction
+import draft
+from draft import ADMIN_IDS
+from lot import Lot
+from outbound import OutboundScheduler
+
+_sleep = asyncio.sleep
+
+
+async def _fast_sleep(delay, *args, **kwargs):
+    await _sleep(0)
+
+
+@pytest.fixture
+def fast_draft():
+    start_clock = Lot.start_clock
+    with mock.patch.object(auction, "embed"), \
+            mock.patch.object(auction.AuctionBot, "get_mention", mock.Mock(return_value=None)), \
+            mock.patch.object(auction, "CAPTAIN_NOMINATION_TIMEOUT", 0.01), \
+            mock.patch.object(auction.asyncio, "sleep", _fast_sleep), \
+            mock.patch.object(draft, "TEAM_SIZE", 1), \
+            mock.patch.object(Lot, "start_clock", lambda lot: start_clock(lot, 0.05)):
+        yield
+
+
+@pytest.fixture
+def bot(fast_draft, bot):
+    bot.outbound = OutboundScheduler(rate=1e6, burst=1e6)
+    bot.auction.addCaptain("Cev", 1000)
+    bot.auction.addCaptain("yfu", 900)
+    bot.auction.addPlayer("toth", 5000)
+    bot.auction.addPlayer("Scrub", 3000)
+    return bot
+
+
+def _start(bot):
+    # Starting flushes in the background, so this has to run on the test's loop
+    bot.auction.start(
+        message=mock.Mock(content="!start", author=mock.Mock(id=ADMIN_IDS[0]))
+    )
+    ctx = mock.Mock()
+    ctx.channel.send = mock.AsyncMock()
+    return ctx
+
+
+async def _wait_for(condition):
+    for _ in range(1000):
+        if condition():
+            return
+        await _sleep(0.005)
+    raise AssertionError("timed out")
+
+
+def test_driver_runs_draft_to_the_end(bot):
+    async def go():
+        ctx = _start(bot)
+        assert bot.start_driver(ctx)
+        assert not bot.start_driver(ctx)
+        await asyncio.wait_for(bot.driver, 5)
+        assert bot.driver.exception() is None
+        assert [n.player_name for n in bot.auction.nominations] == ["toth", "Scrub"]
+        ctx.channel.send.assert_any_call(content="All done. *Throne exploding noises*", embed=None)
+
+    asyncio.run(go())
+
+
+def test_stopped_driver_restarts_on_the_same_lot(bot):
+    async def go():
+        ctx = _start(bot)
+        bot.start_driver(ctx)
+        await _wait_for(lambda: bot.auction.machine.state == "bidding")
+        lot = bot.auction.current_lot
+
+        assert await bot.stop_driver()
+        assert not await bot.stop_driver()
+        assert lot.is_paused
+        assert bot.auction.machine.state == "bidding"
+
+        bot.start_driver(ctx)
+        await _sleep(0.1)
+        assert bot.auction.nominations == []
+        lot.resume()
+        bot.wake_lot()
+        await _wait_for(lambda: len(bot.auction.nominations) == 1)
+        assert bot.auction.nominations[0].player_name == lot.player
+        await bot.stop_driver()
+
+    asyncio.run(go())
+
+
+def test_nominate_after_an_autonominated_lot_closes_is_not_too_late(bot):
+    async def go():
+        _start(bot)
+        bot.current_timer = mock.Mock(expired=True)
+        bot.auction.close_current_lot = mock.Mock(return_value=[])
+        bot.auction.give_lot_to_winner = mock.Mock()
+        bot._close_lot()
+        assert bot.current_timer is None
+
+        # Before the driver opens the next turn
+        bot.auction.nominate = mock.Mock(return_value="lot")
+        assert bot._apply_nomination(mock.Mock()) == "lot"
+
+    asyncio.run(go())
+
+
+def test_nominate_while_a_lot_is_up_is_rejected(bot):
+    async def go():
+        _start(bot)
+        lot = mock.Mock(player="toth")
+        bot.auction.current_lot = lot
+        bot.auction.nominate = mock.Mock(return_value="lot")
+        with pytest.raises(draft.AuctionValidationError):
+            bot._apply_nomination(mock.Mock())
+        bot.auction.nominate.assert_not_called()
+        assert bot.auction.current_lot is lot
+
+    asyncio.run(go())
+
+
+def test_lot_paused_before_its_clock_started_gets_one_on_resume(bot):
+    async def go():
+        ctx = _start(bot)
+        bot.auction.nominate(mock.Mock(content="!nominate toth Cev", author=mock.Mock(id=ADMIN_IDS[0])))
+        bot.auction.machine.buff_from_nom()
+        bot.auction.machine.bid_from_buff()
+        lot = bot.auction.current_lot
+        lot.pause()
+
+        bot.start_driver(ctx)
+        await _sleep(0.05)
+        lot.resume()
+        bot.wake_lot()
+        await _wait_for(lambda: len(bot.auction.nominations) == 1)
+        await bot.stop_driver()
+
+    asyncio.run(go())
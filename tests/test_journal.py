@@ -0,0 +1,77 @@
+from unittest import mock
+
+from draft import Auction, ADMIN_IDS
+from journal import FileJournal
+
+ADMIN = mock.Mock(id=ADMIN_IDS[0])
+
+
+def _make_auction(journal_dir, snapshot_every=200):
+    return Auction(journal=FileJournal(str(journal_dir), snapshot_every=snapshot_every))
+
+
+def _draft_two_lots(auction):
+    auction.addCaptain("Cev", 1000)
+    auction.addCaptain("yfu", 900)
+    auction.addPlayer("Scrub", 3000)
+    auction.addPlayer("toth", 4000)
+    auction.start(mock.Mock(content="!start", author=ADMIN))
+    for nomination, bid in [("!nominate Scrub Cev", "!bid 100 yfu"), ("!nominate toth yfu", "!bid 50 Cev")]:
+        auction.nominate(mock.Mock(content=nomination, author=ADMIN))
+        auction.machine.buff_from_nom()
+        auction.machine.bid_from_buff()
+        auction.bid(mock.Mock(content=bid, author=ADMIN))
+        for _ in auction.run_current_lot():
+            pass
+        auction.give_lot_to_winner()
+
+
+def _state(auction):
+    return (
+        auction.captains,
+        auction.players,
+        auction.nominations,
+        auction.scheduler.to_dict(),
+    )
+
+
+def test_journal_replay_restores_draft(tmp_path):
+    auction = _make_auction(tmp_path)
+    _draft_two_lots(auction)
+    assert "players" not in auction.db
+
+    recovered = _make_auction(tmp_path)
+    assert _state(recovered) == _state(auction)
+    assert recovered.search_captain("yfu")["dollars"] == 800
+    assert recovered.rosters.count("Cev") == 1
+
+
+def test_journal_snapshot_and_tail(tmp_path):
+    auction = _make_auction(tmp_path, snapshot_every=5)
+    _draft_two_lots(auction)
+    assert (tmp_path / "snapshot.json").exists()
+
+    recovered = _make_auction(tmp_path, snapshot_every=5)
+    assert _state(recovered) == _state(auction)
+
+
+def test_journal_undo_is_exact_after_restart(tmp_path):
+    auction = _make_auction(tmp_path)
+    _draft_two_lots(auction)
+    auction.pop_recent_nomination(1)
+
+    recovered = _make_auction(tmp_path)
+    assert [n.player_name for n in recovered.nominations] == ["toth"]
+    assert not recovered.search_player("Scrub")["is_picked"]
+    assert recovered.search_captain("yfu")["dollars"] == 900
+    assert _state(recovered) == _state(auction)
+
+
+def test_delete_db_resets_the_journal(tmp_path):
+    auction = _make_auction(tmp_path)
+    _draft_two_lots(auction)
+    auction.delete_db()
+    assert auction.captains == [] and auction.nominations == []
+
+    restarted = _make_auction(tmp_path)
+    assert restarted.captains == [] and restarted.players == [] and restarted.nominations == []
@@ -0,0 +1,81 @@
+import gzip
+import json
+import logging
+import queue
+import time
+
+from log_utils import (
+    EventFileHandler,
+    EventLogListener,
+    EventQueueHandler,
+    JsonEventFormatter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _pipeline(tmp_path, **kwargs):
+    handler = EventFileHandler(str(tmp_path / "events.log"), **kwargs)
+    handler.setFormatter(JsonEventFormatter("%(message)s"))
+    events = queue.SimpleQueue()
+    logger = logging.Logger("test-events")
+    logger.addHandler(EventQueueHandler(events))
+    listener = EventLogListener(events, handler)
+    listener.start()
+    return logger, listener, handler, events
+
+
+def test_payloads_are_encoded_on_the_listener_and_drained_on_stop(tmp_path):
+    logger, listener, handler, events = _pipeline(tmp_path)
+    for i in range(500):
+        logger.info(dict(event="bid", amount=i))
+    logger.warning("not a payload")
+    # What log_command puts on the queue
+    events.put((time.time(), dict(event="lot_closed")))
+    listener.stop()
+    handler.close()
+
+    lines = (tmp_path / "events.log").read_text().splitlines()
+    assert len(lines) == 502
+    first = json.loads(lines[0])
+    assert list(first) == ["timestamp", "event", "amount"]
+    assert first["amount"] == 0
+    assert json.loads(lines[499])["amount"] == 499
+    assert lines[500] == "not a payload"
+    assert json.loads(lines[501])["event"] == "lot_closed"
+
+
+def test_rolls_over_by_size_and_gzips_old_logs(tmp_path):
+    logger, listener, handler, _ = _pipeline(tmp_path, max_bytes=200, backups=3)
+    for i in range(20):
+        logger.info(dict(event="bid", amount=i))
+    listener.stop()
+    handler.close()
+
+    rotated = sorted(p.name for p in tmp_path.iterdir() if p.name.endswith(".gz"))
+    assert rotated == ["events.log.1.gz", "events.log.2.gz", "events.log.3.gz"]
+    newest = gzip.decompress((tmp_path / "events.log.1.gz").read_bytes()).decode()
+    current = (tmp_path / "events.log").read_text()
+    assert json.loads(newest.splitlines()[-1])["amount"] + 1 == json.loads(current.splitlines()[0])["amount"]
+
+
+def test_rolls_over_by_age(tmp_path):
+    clock = FakeClock()
+    handler = EventFileHandler(str(tmp_path / "events.log"), rotate_every=60, clock=clock)
+    record = logging.LogRecord("events", logging.INFO, "", 0, dict(event="start"), (), None)
+    handler.emit(record)
+    clock.now += 30
+    handler.emit(record)
+    assert not (tmp_path / "events.log.1.gz").exists()
+    clock.now += 31
+    handler.emit(record)
+    handler.close()
+
+    assert len(gzip.decompress((tmp_path / "events.log.1.gz").read_bytes()).splitlines()) == 2
+    assert len((tmp_path / "events.log").read_text().splitlines()) == 1
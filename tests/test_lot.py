@@ -0,0 +1,136 @@
+from unittest import mock
+
+from lot import Lot
+
+
+def _bid(captain_name, amount, all_in=False):
+    return dict(captain_name=captain_name, amount=amount, all_in=all_in)
+
+
+def test_current_max_bid_tracks_highest():
+    lot = Lot("toth", "Cev")
+    assert lot.current_max_bid is None
+    lot.add_bid(_bid("Cev", 100))
+    lot.add_bid(_bid("yfu", 150))
+    lot.add_bid(_bid("Cev", 120))
+    assert lot.current_max_bid == _bid("yfu", 150)
+    assert lot.determine_winner() == dict(captain="yfu", amount=150, player="toth")
+
+
+def test_all_in_ties_are_broken_randomly():
+    lot = Lot("toth", "Cev")
+    lot.add_bid(_bid("Cev", 100))
+    lot.add_bid(_bid("yfu", 200, all_in=True))
+    lot.add_bid(_bid("Cev", 200, all_in=True))
+    assert lot.current_max_bid["captain_name"] == "Cev"
+    assert [b["captain_name"] for b in lot.tied_bids] == ["yfu", "Cev"]
+
+    with mock.patch("lot.random.choice", side_effect=lambda bids: bids[0]):
+        assert lot.determine_winner()["captain"] == "yfu"
+
+
+def test_no_bids_goes_to_nominator():
+    assert Lot("toth", "Cev").determine_winner() == dict(captain="Cev", amount=0, player="toth")
+
+
+def test_from_dict_keeps_bids():
+    lot = Lot("toth", "Cev")
+    lot.add_bid(_bid("Cev", 100))
+    lot.add_bid(_bid("yfu", 150))
+    restored = Lot.from_dict(lot.to_dict())
+    assert restored.current_bids == lot.current_bids
+    assert restored.current_max_bid == _bid("yfu", 150)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bid_resets_deadline_from_current_time():
+    clock = FakeClock()
+    lot = Lot("toth", "Cev", clock=clock)
+    lot.start_clock(45)
+    clock.now += 40
+    assert lot.seconds_left() == 5
+    lot.add_bid(_bid("Cev", 100))
+    assert lot.seconds_left() == 45
+    clock.now += 45
+    assert lot.is_closed()
+
+
+def test_pause_keeps_remaining_time():
+    clock = FakeClock()
+    lot = Lot("toth", "Cev", clock=clock)
+    lot.start_clock(30)
+    clock.now += 12
+    lot.pause()
+    clock.now += 600
+    assert lot.seconds_left() == 18
+    assert not lot.is_closed()
+    lot.add_bid(_bid("Cev", 100))
+    assert lot.seconds_left() == 45
+    lot.resume()
+    clock.now += 44
+    assert not lot.is_closed()
+    clock.now += 1
+    assert lot.is_closed()
+
+
+def test_announcements_fall_on_multiples_of_five():
+    clock = FakeClock()
+    lot = Lot("toth", "Cev", clock=clock)
+    lot.start_clock(45)
+    assert lot.next_announcement() == 40
+    clock.now += 5.5
+    assert lot.next_announcement() == 35
+    clock.now += 38
+    assert lot.next_announcement() == 0
+
+
+def test_close_records_drift():
+    clock = FakeClock()
+    lot = Lot("toth", "Cev", clock=clock)
+    lot.start_clock(45)
+    lot.add_bid(_bid("yfu", 150))
+    clock.now += 45.25
+    lot.close()
+    assert lot.close_drift == 0.25
+    assert lot.winning_bid == dict(captain="yfu", amount=150, player="toth")
+
+
+def test_late_bids_need_the_grace_window_and_a_timely_send():
+    clock = FakeClock()
+    wall = FakeClock()
+    wall.now = 5000.0
+    lot = Lot("toth", "Cev", clock=clock, wall_clock=wall)
+    lot.start_clock(30)
+    clock.now += 29
+    assert not lot.begin_close()
+    clock.now += 1.5
+    wall.now += 30.5
+    assert lot.begin_close()
+
+    # Sent 0.5s before the deadline, and 0.1s after it
+    assert lot.sent_in_time(wall.now - 1)
+    assert not lot.sent_in_time(wall.now - 0.4)
+    assert lot.grace_left() == 1
+
+    # Bids during the grace window don't move the deadline
+    deadline = lot.deadline
+    lot.add_bid(_bid("Cev", 100))
+    assert lot.deadline == deadline
+    lot.pause()
+    assert not lot.is_paused
+
+
+def test_late_bids_come_out_in_send_order():
+    lot = Lot("toth", "Cev")
+    lot.hold_late_bid(12.5, "second")
+    lot.hold_late_bid(12.0, "first")
+    lot.hold_late_bid(13.0, "third")
+    assert lot.take_late_bids() == ["first", "second", "third"]
+    assert lot.take_late_bids() == []
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from member_index import MemberIndex
+
+
+def _member(name, user_id, guild_id=1):
+    member = mock.Mock(id=user_id, guild=mock.Mock(id=guild_id))
+    member.name = name
+    return member
+
+
+def test_hits_misses_and_scan_fallback():
+    index = MemberIndex()
+    cev = _member("Cev", 10)
+    index.rebuild([cev, _member("yfu", 11)])
+    assert index.get("Cev") is cev
+
+    late_joiner = _member("toth", 12)
+    scan = mock.Mock(return_value=late_joiner)
+    assert index.get("toth", scan=scan) is late_joiner
+    assert index.get("toth", scan=scan) is late_joiner
+    scan.assert_called_once_with("toth")
+    assert index.get("nobody") is None
+    assert index.stats() == dict(names=3, members=3, hits=2, misses=2)
+
+
+def test_members_follow_join_leave_and_rename():
+    index = MemberIndex()
+    cev = _member("Cev", 10)
+    cev_elsewhere = _member("Cev", 10, guild_id=2)
+    index.add(cev)
+    index.add(cev_elsewhere)
+    index.remove(cev)
+    assert index.get("Cev") is cev_elsewhere
+
+    index.rename(10, "Cev", "Cevapi")
+    cev_elsewhere.name = "Cevapi"
+    assert index.get("Cev") is None
+    assert index.get("Cevapi") is cev_elsewhere
+    index.remove(cev_elsewhere)
+    assert len(index) == 0
@@ -0,0 +1,91 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import auction
+import metrics
+from draft import AuctionValidationError, ClientMessage, ClientMessageType
+from metrics import Counter, Gauge, Histogram
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    saved = list(metrics.registry)
+    metrics.registry.clear()
+    yield
+    metrics.registry[:] = saved
+
+
+def test_histogram_renders_cumulative_buckets():
+    latency = Histogram("bid_seconds", "Bid latency", labels=("outcome",), buckets=(0.01, 0.1, 1))
+    for value in (0.005, 0.01, 0.05, 2):
+        latency.observe(value, "accepted")
+    latency.observe(0.5, "rejected")
+
+    assert latency.count("accepted") == 4
+    assert metrics.render().splitlines() == [
+        "# HELP bid_seconds Bid latency",
+        "# TYPE bid_seconds histogram",
+        'bid_seconds_bucket{outcome="accepted",le="0.01"} 2',
+        'bid_seconds_bucket{outcome="accepted",le="0.1"} 3',
+        'bid_seconds_bucket{outcome="accepted",le="1"} 3',
+        'bid_seconds_bucket{outcome="accepted",le="+Inf"} 4',
+        'bid_seconds_sum{outcome="accepted"} 2.065',
+        'bid_seconds_count{outcome="accepted"} 4',
+        'bid_seconds_bucket{outcome="rejected",le="0.01"} 0',
+        'bid_seconds_bucket{outcome="rejected",le="0.1"} 0',
+        'bid_seconds_bucket{outcome="rejected",le="1"} 1',
+        'bid_seconds_bucket{outcome="rejected",le="+Inf"} 1',
+        'bid_seconds_sum{outcome="rejected"} 0.5',
+        'bid_seconds_count{outcome="rejected"} 1',
+    ]
+
+
+def test_counters_and_gauges():
+    commands = Counter("commands_total", "Commands", labels=("command",))
+    commands.inc("bid")
+    commands.inc("bid")
+    commands.inc('say "hi"\n')
+    depth = Gauge("depth", "Queue depth", labels=("channel",))
+    depth.set_function(lambda: {("42",): 3})
+    lag = Gauge("lag", "Loop lag")
+    lag.set(0.25)
+
+    assert metrics.render().splitlines() == [
+        "# HELP commands_total Commands",
+        "# TYPE commands_total counter",
+        'commands_total{command="bid"} 2',
+        'commands_total{command="say \\"hi\\"\\n"} 1',
+        "# HELP depth Queue depth",
+        "# TYPE depth gauge",
+        'depth{channel="42"} 3',
+        "# HELP lag Loop lag",
+        "# TYPE lag gauge",
+        "lag 0.25",
+    ]
+
+
+def test_a_failing_gauge_does_not_break_the_page():
+    broken = Gauge("broken", "Reads from something that raises")
+    broken.set_function(lambda: 1 / 0)
+    Counter("ok_total", "Still rendered").inc()
+    assert metrics.render().splitlines()[-1] == "ok_total 1"
+
+
+
+def test_rejected_bids_are_acked_and_recorded(bot):
+    async def go():
+        bot.auction.current_lot = mock.Mock(player="toth")
+        bot.whitelist = mock.Mock(return_value=True)
+        rejection = AuctionValidationError(ClientMessage(ClientMessageType.REACT, "-"))
+        bot.apply = mock.AsyncMock(side_effect=rejection)
+        ctx = mock.Mock()
+        ctx.message.add_reaction = mock.AsyncMock()
+        await auction.AuctionBot.bid.callback(bot, ctx)
+        return ctx
+
+    before = metrics.BID_ACK_LATENCY.count("rejected")
+    ctx = asyncio.run(go())
+    ctx.message.add_reaction.assert_awaited_once()
+    assert metrics.BID_ACK_LATENCY.count("rejected") == before + 1
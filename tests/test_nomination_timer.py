@@ -0,0 +1,83 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import auction
+from auction import NominationTimer
+
+
+@pytest.fixture(autouse=True)
+def quiet_discord():
+    with mock.patch.object(auction, "embed"), mock.patch.object(
+        auction.AuctionBot, "get_mention", mock.Mock(return_value=None)
+    ):
+        yield
+
+
+def _ctx():
+    ctx = mock.Mock()
+    ctx.send = mock.AsyncMock()
+    return ctx
+
+
+def _sent(ctx):
+    return [call.args[0] for call in ctx.send.call_args_list if call.args]
+
+
+def test_expiry_calls_on_expire_once():
+    async def go():
+        on_expire = mock.Mock(return_value="lot")
+        timer = NominationTimer(0.05, "Cev", _ctx(), on_expire=on_expire)
+        assert await timer.start() == "lot"
+        assert timer.expired
+        assert not timer.cancel()
+        on_expire.assert_called_once_with()
+
+    asyncio.run(go())
+
+
+def test_cancel_wins_before_expiry():
+    async def go():
+        on_expire = mock.Mock()
+        timer = NominationTimer(5, "Cev", _ctx(), on_expire=on_expire)
+        task = timer.start()
+        await asyncio.sleep(0.01)
+        assert timer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not timer.expired
+        on_expire.assert_not_called()
+
+    asyncio.run(go())
+
+
+def test_pause_holds_the_remaining_time():
+    async def go():
+        on_expire = mock.Mock()
+        timer = NominationTimer(0.1, "Cev", _ctx(), on_expire=on_expire)
+        task = timer.start()
+        await asyncio.sleep(0.02)
+        timer.pause()
+        await asyncio.sleep(0.2)
+        assert not task.done()
+        assert 0 < timer.paused_remaining < 0.1
+        timer.resume()
+        await asyncio.wait_for(task, 1)
+        on_expire.assert_called_once_with()
+
+    asyncio.run(go())
+
+
+def test_warnings_are_sent_once_each():
+    async def go():
+        ctx = _ctx()
+        with mock.patch.object(auction, "NOMINATION_WARNINGS", (0.1, 0.05)):
+            await NominationTimer(0.15, "Cev", ctx).start()
+        warnings = [m for m in _sent(ctx) if "seconds left" in str(m)]
+        assert warnings == [
+            "Cev has 0.1 seconds left to nominate a player.",
+            "Cev has 0.05 seconds left to nominate a player.",
+        ]
+
+    asyncio.run(go())
@@ -0,0 +1,71 @@
+import asyncio
+from unittest import mock
+
+from outbound import COUNTDOWN, NORMAL, URGENT, ChannelSender, OutboundScheduler
+
+
+def _channel():
+    channel = mock.Mock(id=1)
+    channel.sent = []
+
+    async def send(content=None, embed=None):
+        channel.sent.append(content)
+        return content
+
+    channel.send = send
+    return channel
+
+
+def test_urgent_messages_jump_the_queue():
+    async def go():
+        channel = _channel()
+        sender = ChannelSender(channel, rate=100, burst=1)
+        futures = [
+            sender.send("announcement 1"),
+            sender.send("announcement 2"),
+            sender.send("10 seconds left", priority=COUNTDOWN),
+            sender.send("bid ack", priority=URGENT),
+        ]
+        await asyncio.gather(*futures)
+        sender.close()
+        return channel.sent
+
+    assert asyncio.run(go()) == ["bid ack", "announcement 1", "announcement 2", "10 seconds left"]
+
+
+def test_stale_countdowns_are_merged():
+    async def go():
+        channel = _channel()
+        sender = ChannelSender(channel, rate=100, burst=1)
+        first = sender.send("first", priority=NORMAL)
+        stale = sender.send("15 seconds left", priority=COUNTDOWN)
+        latest = sender.send("10 seconds left", priority=COUNTDOWN)
+        await asyncio.gather(first, latest)
+        sender.close()
+        return channel.sent, await stale, sender.stats()
+
+    sent, stale_result, stats = asyncio.run(go())
+    assert sent == ["first", "10 seconds left"]
+    assert stale_result is None
+    assert stats["merged"] == 1
+    assert stats["sent"] == 2
+    assert stats["depth"] == 0
+
+
+def test_token_bucket_paces_sends():
+    async def go():
+        channel = _channel()
+        scheduler = OutboundScheduler(rate=50, burst=2)
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        await asyncio.gather(*[scheduler.send(channel, str(i)) for i in range(5)])
+        elapsed = loop.time() - start
+        stats = scheduler.stats()[1]
+        scheduler.close()
+        return channel.sent, elapsed, stats
+
+    sent, elapsed, stats = asyncio.run(go())
+    assert sent == ["0", "1", "2", "3", "4"]
+    # Two go out right away, the other three wait ~20ms each for a token
+    assert elapsed >= 0.05
+    assert stats["max_depth"] == 5
@@ -0,0 +1,73 @@
+import asyncio
+from unittest import mock
+
+import embed
+from draft import Auction
+from embed import FIELD_LIMIT, page_boundaries
+from paginator import PAGE_NEXT, PAGE_PREV, Paginator
+
+
+def _players(n):
+    return [dict(name=f"Player with a long-ish name {i}", mmr=6000 - i, is_picked=False) for i in range(n)]
+
+
+def test_pages_fit_discord_field_limit():
+    pages = embed.playerlist_pages(_players(300))
+    assert len(pages) > 1
+    names = []
+    for page in pages:
+        for field in page.fields:
+            assert len(field.value) <= FIELD_LIMIT
+        names.extend(page.fields[0].value.split("\n"))
+    assert names == [p["name"] for p in _players(300)]
+    assert pages[0].footer.text == f"Page 1/{len(pages)}"
+
+
+def test_page_boundaries_split_on_either_column():
+    rows = [("a" * 9, "b" * 99)] * 25
+    # The second column fills a page after 10 rows (10 * 100 - 1 chars)
+    assert page_boundaries(rows, max_rows=100) == [(0, 10), (10, 20), (20, 25)]
+    assert page_boundaries(rows, max_rows=4)[0] == (0, 4)
+
+
+def test_pages_are_cached_per_auction_and_version():
+    alpha, beta = Auction(db={}), Auction(db={})
+    alpha.addPlayer("Alpha", 5000)
+    beta.addPlayer("Beta", 5000)
+    assert alpha.version == beta.version
+
+    first = embed.playerlist_pages(auction=alpha)
+    assert embed.playerlist_pages(auction=alpha) is first
+    assert "Beta" in embed.playerlist_pages(auction=beta)[0].fields[0].value
+
+    alpha.addPlayer("Gamma", 4000)
+    second = embed.playerlist_pages(auction=alpha)
+    assert second is not first
+    assert second[0].fields[0].value == "Alpha\nGamma"
+
+
+def test_reactions_flip_one_message_in_place():
+    async def go():
+        pages = embed.playerlist_pages(_players(100))
+        message = mock.Mock(id=42)
+        message.add_reaction = mock.AsyncMock()
+        message.edit = mock.AsyncMock()
+        message.remove_reaction = mock.AsyncMock()
+        send = mock.AsyncMock(return_value=message)
+
+        paginator = Paginator()
+        await paginator.send(send, lambda: pages)
+        send.assert_awaited_once_with(embed=pages[0])
+        assert message.add_reaction.await_count == 2
+
+        assert await paginator.on_reaction(42, PAGE_NEXT, user="Cev")
+        message.edit.assert_awaited_once_with(embed=pages[1])
+        message.remove_reaction.assert_awaited_once_with(PAGE_NEXT, "Cev")
+
+        await paginator.on_reaction(42, PAGE_PREV)
+        await paginator.on_reaction(42, PAGE_PREV)
+        assert message.edit.await_count == 2
+        assert not await paginator.on_reaction(43, PAGE_NEXT)
+        assert not await paginator.on_reaction(42, "👍")
+
+    asyncio.run(go())
@@ -0,0 +1,43 @@
+import random
+
+from player_pool import PlayerPool
+
+
+def _player(name, mmr, is_picked=False):
+    return dict(name=name, mmr=mmr, is_picked=is_picked)
+
+
+def _sorted_remaining(players):
+    remaining = [p for p in players if not p["is_picked"]]
+    return sorted(remaining, key=lambda x: x["mmr"], reverse=True)
+
+
+def test_pool_matches_a_full_sort_through_picks_and_undos():
+    rng = random.Random(7)
+    players = [_player(f"p{i}", rng.choice([3000, 4000, 4500, 5000])) for i in range(40)]
+    players[3]["is_picked"] = True
+    pool = PlayerPool()
+    pool.rebuild(players)
+    assert pool.players == _sorted_remaining(players)
+
+    for _ in range(200):
+        player = rng.choice(players)
+        if player["is_picked"]:
+            player["is_picked"] = False
+            pool.add(player)
+        else:
+            player["is_picked"] = True
+            pool.remove(player)
+        assert pool.players == _sorted_remaining(players)
+    assert pool.top() is (pool.players[0] if pool.players else None)
+
+
+def test_adding_twice_is_a_no_op():
+    pool = PlayerPool()
+    toth = _player("toth", 5000)
+    pool.add(toth)
+    pool.add(toth)
+    assert len(pool) == 1
+    pool.remove(toth)
+    pool.remove(toth)
+    assert pool.top() is None
@@ -0,0 +1,90 @@
+import asyncio
+from unittest import mock
+
+import discord
+import pytest
+
+import auction
+from draft import ADMIN_IDS
+from purge import BULK_DELETE_MAX, PurgeQueue
+
+
+def _channel(channel_id=1):
+    channel = mock.Mock(id=channel_id)
+    channel.delete_messages = mock.AsyncMock()
+    return channel
+
+
+def _message(channel, author_id=7):
+    message = mock.Mock(channel=channel, author=mock.Mock(id=author_id))
+    message.delete = mock.AsyncMock()
+    return message
+
+
+def test_messages_are_deleted_in_bulk_per_channel():
+    async def go():
+        purge = PurgeQueue(interval=0.01)
+        busy, quiet = _channel(1), _channel(2)
+        chatter = [_message(busy) for _ in range(BULK_DELETE_MAX + 20)]
+        for message in chatter:
+            purge.add(message)
+        lone = _message(quiet)
+        purge.add(lone)
+        await asyncio.sleep(0.05)
+        purge.close()
+
+        assert busy.delete_messages.await_count == 2
+        assert busy.delete_messages.await_args_list[0].args[0] == chatter[:BULK_DELETE_MAX]
+        assert busy.delete_messages.await_args_list[1].args[0] == chatter[BULK_DELETE_MAX:]
+        # Bulk delete needs at least two messages
+        quiet.delete_messages.assert_not_awaited()
+        lone.delete.assert_awaited_once()
+        return purge.stats()
+
+    assert asyncio.run(go()) == dict(
+        deleted=BULK_DELETE_MAX + 21, api_calls=3, api_calls_saved=BULK_DELETE_MAX + 18, failures=0
+    )
+
+
+def test_failed_delete_is_counted_and_does_not_stop_the_queue():
+    async def go():
+        purge = PurgeQueue(interval=0.01)
+        channel = _channel()
+        response = mock.Mock(status=403, reason="Forbidden")
+        channel.delete_messages.side_effect = [discord.Forbidden(response, "Missing Permissions"), None]
+        for _ in range(2):
+            purge.add(_message(channel))
+        await asyncio.sleep(0.03)
+        for _ in range(2):
+            purge.add(_message(channel))
+        await asyncio.sleep(0.03)
+        purge.close()
+        return channel.delete_messages.await_count, purge.stats()["failures"]
+
+    assert asyncio.run(go()) == (2, 1)
+
+
+@pytest.fixture
+def bot(bot):
+    bot.purge = mock.Mock()
+    return bot
+
+
+def test_on_message_before_start_is_ignored(bot):
+    asyncio.run(bot.on_message(_message(_channel())))
+    bot.purge.add.assert_not_called()
+
+
+def test_on_message_only_queues_chatter_in_the_draft_channel_off_phase(bot):
+    draft_channel = _channel(1)
+    bot.purge_channel_id = draft_channel.id
+    bot.auction.machine.set_state("break")
+
+    chatter = _message(draft_channel)
+    for message in (chatter, _message(_channel(2)), _message(draft_channel, author_id=ADMIN_IDS[0])):
+        asyncio.run(bot.on_message(message))
+    bot.purge.add.assert_called_once_with(chatter)
+
+    bot.auction.machine.set_state("bidding")
+    asyncio.run(bot.on_message(_message(draft_channel)))
+    bot.purge.add.assert_called_once()
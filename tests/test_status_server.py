@@ -0,0 +1,123 @@
+import asyncio
+import json
+from unittest import mock
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import auction
+from draft import Auction
+from keep_alive import StatusServer
+from loop_monitor import LoopStallMonitor
+
+
+def _auction():
+    auction = Auction(db={})
+    auction.addCaptain("Cev", 1000)
+    auction.addPlayer("toth", 5000)
+    return auction
+
+
+def _discord_client(connected=True):
+    client = mock.Mock(latency=0.042)
+    client.ws = mock.Mock(open=connected) if connected else None
+    client.is_ready.return_value = connected
+    return client
+
+
+def _serve(server, requests):
+    """Runs requests(get) against the server, get(path, **headers) -> (status, headers, body)."""
+    async def go():
+        async with TestClient(TestServer(server.app)) as http:
+            async def get(path, **headers):
+                response = await http.get(path, headers=headers)
+                return response.status, response.headers, await response.read()
+
+            return await requests(get)
+
+    return asyncio.run(go())
+
+
+def test_healthz_reports_gateway_and_loop_lag():
+    monitor = LoopStallMonitor()
+    server = StatusServer(_discord_client(), _auction(), monitor)
+
+    async def requests(get):
+        status, _, body = await get("/healthz")
+        assert status == 200
+        assert json.loads(body)["gateway_latency_ms"] == 42.0
+
+        monitor.last_stall = 2.5
+        status, _, body = await get("/healthz")
+        assert status == 503
+        assert json.loads(body)["loop_lag_ms"] == 2500.0
+
+        monitor.last_stall = 0
+        server.client = _discord_client(connected=False)
+        status, _, body = await get("/healthz")
+        assert status == 503
+        assert not json.loads(body)["gateway_connected"]
+
+    _serve(server, requests)
+
+
+def test_state_is_rendered_once_per_state_key_and_served_with_etags():
+    auction = _auction()
+    server = StatusServer(_discord_client(), auction, LoopStallMonitor())
+
+    async def requests(get):
+        status, headers, body = await get("/state")
+        assert status == 200
+        state = json.loads(body)
+        assert state["state"] == "asleep"
+        assert state["captains"] == [dict(name="Cev", dollars=1000, roster=[])]
+        etag = headers["ETag"]
+
+        assert (await get("/state", **{"If-None-Match": etag}))[0] == 304
+        assert (await get("/state"))[0] == 200
+        assert server.stats() == dict(state_renders=1, not_modified=1)
+
+        auction.addPlayer("Buck", 4000)
+        status, headers, body = await get("/state", **{"If-None-Match": etag})
+        assert status == 200
+        assert headers["ETag"] != etag
+        assert json.loads(body)["players_left"] == 2
+
+    _serve(server, requests)
+
+
+def test_state_key_follows_bids():
+    auction = _auction()
+    auction.machine.set_state("bidding")
+    auction.current_lot = mock.Mock(current_bids=[], is_paused=False, closing=False)
+    before = auction.state_key()
+    auction.current_lot.current_bids.append(dict(captain_name="Cev", amount=100))
+    assert auction.state_key() != before
+
+
+def test_metrics_are_served():
+    server = StatusServer(_discord_client(), _auction(), LoopStallMonitor())
+
+    async def requests(get):
+        return await get("/metrics")
+
+    status, headers, body = _serve(server, requests)
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert b"# TYPE auction_loop_lag_seconds histogram" in body
+
+
+def test_bot_closes_the_status_server_when_cancelled(bot):
+    server = mock.Mock()
+    server.close = mock.AsyncMock()
+
+    async def go():
+        task = asyncio.ensure_future(bot.serve_status())
+        await asyncio.sleep(0)
+        assert bot.status_server is server
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        bot.stall_monitor.stop()
+
+    with mock.patch.object(auction, "keep_alive", mock.AsyncMock(return_value=server)):
+        asyncio.run(go())
+    server.close.assert_awaited_once()
@@ -0,0 +1,138 @@
+import pytest
+from unittest import mock
+
+import metrics
+from draft import Auction, Nomination
+from storage import SQLiteStore, WriteBehindStore
+
+
+class CountingDB(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.puts = 0
+
+    def __setitem__(self, key, value):
+        self.puts += 1
+        super().__setitem__(key, value)
+
+
+def test_write_behind_coalesces_writes():
+    db = CountingDB()
+    store = WriteBehindStore(db)
+    for i in range(5):
+        store["players"] = list(range(i))
+    assert db.puts == 0
+    assert store["players"] == [0, 1, 2, 3]
+    assert "players" in store and "players" in store.keys()
+
+    assert store.flush() == 1
+    assert db.puts == 1
+    assert db["players"] == [0, 1, 2, 3]
+    assert store.stats()["writes_avoided"] == 4
+    assert store.flush() == 0
+
+
+def test_write_behind_maybe_flush_waits_for_interval():
+    now = [0]
+    store = WriteBehindStore(CountingDB(), flush_interval=2, clock=lambda: now[0])
+    store["captains"] = []
+    assert store.maybe_flush() == 0
+    now[0] = 2
+    assert store.maybe_flush() == 1
+
+
+def test_write_behind_keeps_dirty_keys_when_flush_fails():
+    db = mock.MagicMock()
+    db.set_bulk_raw.side_effect = ConnectionError
+    store = WriteBehindStore(db)
+    store["players"] = [1]
+    with pytest.raises(ConnectionError):
+        store.flush()
+    store["captains"] = [2]
+    assert store.dirty == {"players": [1], "captains": [2]}
+
+
+def test_auction_bootstrap_writes_each_key_once():
+    db = CountingDB()
+    auction = Auction(db=db)
+    for i in range(50):
+        auction.addPlayer(f"player {i}", i)
+    auction.addCaptain("Cev", 1000)
+    assert db.puts == 0
+
+    auction.flush()
+    assert db.puts == 2
+    assert len(db["players"]) == 50
+
+
+def test_state_transition_flushes():
+    db = CountingDB()
+    auction = Auction(db=db)
+    auction.addCaptain("Cev", 1000)
+    auction.machine.start_machine()
+    assert db["captains"][0]["name"] == "Cev"
+
+
+def _sqlite_auction(tmp_path):
+    return Auction(db=SQLiteStore(str(tmp_path / "draft.db")))
+
+
+def test_sqlite_store_round_trips_auction(tmp_path):
+    auction = _sqlite_auction(tmp_path)
+    auction.addCaptain("Cev", 1000)
+    auction.addPlayer("Scrub", 3000, nicknames=["scrubby"])
+    auction.addPlayer("toth", 4000)
+    auction.populate_nomination_schedule()
+
+    reloaded = _sqlite_auction(tmp_path)
+    assert reloaded.players == auction.players
+    assert reloaded.captains == auction.captains
+    assert reloaded.scheduler.to_dict() == auction.scheduler.to_dict()
+    assert reloaded.search_player("scrubby")["name"] == "Scrub"
+
+
+def test_sqlite_store_point_updates(tmp_path):
+    store = SQLiteStore(str(tmp_path / "draft.db"))
+    players = [dict(name=f"p{i}", mmr=i, is_picked=False) for i in range(100)]
+    store["players"] = players
+
+    statements = store.statements
+    players[42]["is_picked"] = True
+    store.update_record("players", players[42], players)
+    assert store.statements == statements + 1
+    assert store["players"][42]["is_picked"]
+    assert not store["players"][41]["is_picked"]
+
+    nominations = [Nomination("a", "p1", 1, "x", "y", 5), Nomination("b", "p2", 2, "x", "y", 6)]
+    for i in range(2):
+        store.append_record("nominations", nominations[i], nominations[:i + 1])
+    store.remove_record("nominations", nominations[0], nominations[1:])
+    store.append_record("nominations", nominations[0], [nominations[1], nominations[0]])
+    assert [n[0] for n in store["nominations"]] == ["b", "a"]
+
+    del store["players"]
+    assert "players" not in store
+    assert store.keys() == ["nominations"]
+
+
+def test_db_calls_are_timed_at_the_store(tmp_path):
+    def counts(kind):
+        return {op: metrics.STORAGE_LATENCY.count(kind, op) for op in ("read", "write", "delete")}
+
+    before = counts("kv")
+    store = WriteBehindStore({"players": []})
+    store["captains"] = []
+    assert store["captains"] == []  # buffered, never reaches the db
+    assert store["players"] == []
+    store.flush()
+    del store["players"]
+    assert counts("kv") == {op: before[op] + 1 for op in before}
+
+    before = counts("sqlite")
+    store = SQLiteStore(str(tmp_path / "draft.db"))
+    players = [dict(name="p0", mmr=0, is_picked=False)]
+    store["players"] = players
+    store.update_record("players", players[0], players)
+    assert store["players"] == players
+    del store["players"]
+    assert counts("sqlite") == dict(read=before["read"] + 1, write=before["write"] + 2, delete=before["delete"] + 1)
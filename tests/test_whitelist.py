@@ -0,0 +1,54 @@
+from unittest import mock
+
+import pytest
+from discord.enums import ChannelType
+
+import auction
+from auction import UserType
+from draft import ADMIN_IDS
+
+
+@pytest.fixture
+def bot(bot):
+    bot.auction.addCaptain("Cev", 1000)
+    bot.auction.addPlayer("toth", 5000)
+    return bot
+
+
+def _ctx(name, user_id=1, channel_type=ChannelType.text, channel_name="auction-room"):
+    author = mock.Mock(id=user_id)
+    author.name = name
+    channel = mock.Mock(type=channel_type)
+    channel.name = channel_name
+    command = mock.Mock()
+    command.name = "bid"
+    return mock.Mock(channel=channel, message=mock.Mock(author=author), command=command)
+
+
+def _check(bot, ctx, **kwargs):
+    return bot.whitelist(ctx, channel_names=auction.GENERIC_DRAFT_CHANNEL_NAMES, **kwargs)
+
+
+def test_roles_decide_channel_and_dm_access(bot):
+    captain_only = dict(channel=[UserType.CAPTAIN])
+    assert _check(bot, _ctx("Cev"), **captain_only)
+    assert not _check(bot, _ctx("toth"), **captain_only)
+    assert not _check(bot, _ctx("Cev", channel_name="general"), **captain_only)
+    assert _check(bot, _ctx("toth", channel_type=ChannelType.private), dm=[UserType.PLAYER])
+    assert _check(bot, _ctx("nobody", user_id=ADMIN_IDS[0]), channel=[UserType.ADMIN])
+    assert _check(bot, _ctx("nobody"), channel=[UserType.ANY])
+
+
+def test_roles_are_cached_until_the_draft_changes(bot):
+    with mock.patch.object(bot.auction, "search_captain", wraps=bot.auction.search_captain) as search:
+        for _ in range(5):
+            assert _check(bot, _ctx("Cev"), channel=[UserType.CAPTAIN])
+        assert search.call_count == 1
+
+        assert not _check(bot, _ctx("yfu", user_id=2), channel=[UserType.CAPTAIN])
+        bot.auction.addCaptain("yfu", 900)
+        assert _check(bot, _ctx("yfu", user_id=2), channel=[UserType.CAPTAIN])
+
+    count, mean, longest = bot.whitelist_stats()["bid"]
+    assert count == 7
+    assert 0 <= mean <= longest